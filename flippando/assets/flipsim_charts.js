@@ -0,0 +1,224 @@
+// Charts of flip_sim_dash.py, composed in the browser from the series store.
+//
+// The server sends every series once as a Plotly typed array (see flipsim.plots.encode_results)
+// and these functions build the same figures as flipsim.plots.build_figures around them, so
+// switching charts or the y-axis scale never goes back to the server. Long horizons arrive
+// downsampled; zooming into a chart asks the server for the visible window only (zoom below).
+
+(function () {
+    function decode(spec) {
+        var bytes = Uint8Array.from(atob(spec.bdata), function (c) { return c.charCodeAt(0); });
+        return spec.dtype === 'f8' ? new Float64Array(bytes.buffer) : new Float32Array(bytes.buffer);
+    }
+
+    function last(spec) {
+        var values = decode(spec);
+        return values[values.length - 1];
+    }
+
+    // Line trace of one series entry: WebGL above the point threshold, days implied unless downsampled
+    function trace(payload, entry, extra) {
+        var result = {type: entry.n > payload.webgl_threshold ? 'scattergl' : 'scatter', mode: 'lines', y: entry.y};
+        if (entry.x) {
+            result.x = entry.x;
+        } else {
+            result.x0 = payload.start;
+            result.dx = 1;
+        }
+        return Object.assign(result, extra || {});
+    }
+
+    function line(payload, name, label) {
+        return trace(payload, payload.series[name], {name: label});
+    }
+
+    // p5-p95 band and median, as add_band draws them, when the payload comes from an ensemble
+    function band(payload, name, label) {
+        if (!payload.bands) {
+            return [];
+        }
+        var stats = payload.bands[name];
+        return [
+            trace(payload, stats.p95, {line: {width: 0}, showlegend: false, hoverinfo: 'skip'}),
+            trace(payload, stats.p5, {line: {width: 0}, fill: 'tonexty', name: label + ' p5-p95'}),
+            trace(payload, stats.p50, {line: {dash: 'dot'}, name: label + ' Median'})
+        ];
+    }
+
+    function layout(template, scale, title, legendTitle) {
+        var result = {
+            template: template,
+            title: {text: title},
+            xaxis: {title: {text: 'Day'}},
+            yaxis: {title: {text: 'Count'}, type: scale}
+        };
+        if (legendTitle) {
+            result.legend = {title: {text: legendTitle}};
+        }
+        return result;
+    }
+
+    function withBand(payload, name, label) {
+        return band(payload, name, label).concat([line(payload, name, label)]);
+    }
+
+    var charts = {
+        pie: function (payload, template) {
+            return {
+                data: [{
+                    type: 'pie',
+                    labels: ['Unlocked', 'Locked'],
+                    values: [last(payload.series.flip_supply.y), last(payload.series.locked_flip.y)],
+                    title: {text: 'Locked vs Unlocked FLIP'},
+                    textinfo: 'percent+label',
+                    pull: [0.1, 0],
+                    hoverinfo: 'label+percent',
+                    direction: 'clockwise',
+                    sort: false,
+                    insidetextorientation: 'radial',
+                    textposition: 'outside',
+                    textfont: {size: 8},
+                    marker: {line: {color: '#000000', width: 1}}
+                }],
+                layout: {template: template, height: 600, width: 2100, showlegend: false, title: {y: 0.95}}
+            };
+        },
+        flip: function (payload, template, scale) {
+            return {
+                data: withBand(payload, 'flip_supply', 'Unlocked FLIP Supply').concat(withBand(payload, 'locked_flip', 'Locked FLIP')),
+                layout: layout(template, scale, 'FLIP Supply Over Time', 'FLIP Type')
+            };
+        },
+        unlocked_flip: function (payload, template, scale) {
+            return {
+                data: withBand(payload, 'flip_supply', 'Unlocked FLIP Supply'),
+                layout: layout(template, scale, 'Unlocked FLIP Supply Over Time')
+            };
+        },
+        locked_flip: function (payload, template, scale) {
+            return {
+                data: withBand(payload, 'locked_flip', 'Locked FLIP'),
+                layout: layout(template, scale, 'Locked FLIP Over Time')
+            };
+        },
+        basic_nfts: function (payload, template, scale) {
+            return {
+                data: withBand(payload, 'basic_nfts_4x4', '4x4 Basic NFTs').concat(withBand(payload, 'basic_nfts_8x8', '8x8 Basic NFTs')),
+                layout: layout(template, scale, 'Basic NFT Creation Over Time', 'NFT Type')
+            };
+        },
+        cumulative_nfts: function (payload, template, scale) {
+            return {
+                data: [
+                    line(payload, 'cumulative_basic_nfts_4x4', 'Cumulative 4x4 Basic NFTs'),
+                    line(payload, 'cumulative_basic_nfts_8x8', 'Cumulative 8x8 Basic NFTs')
+                ],
+                layout: layout(template, scale, 'Cumulative Basic NFT Creation Over Time', 'NFT Type')
+            };
+        },
+        complex_nfts: function (payload, template, scale) {
+            return {
+                data: withBand(payload, 'complex_nfts', 'Complex NFTs'),
+                layout: layout(template, scale, 'Complex NFT Creation Over Time')
+            };
+        },
+        players: function (payload, template, scale) {
+            return {
+                data: [line(payload, 'players', 'Player Growth')],
+                layout: layout(template, scale, 'Player Growth Over Time', 'Metric')
+            };
+        }
+    };
+
+    // Series of the live chart, in its trace order (flipsim.plots.LIVE_SERIES)
+    var liveSeries = ['flip_supply', 'locked_flip'];
+
+    // The run the live chart shows and the last of its updates applied; resync once one was missed
+    var streamed = {run: null, seq: -1, resync: false};
+
+    // extendData replacing the live chart with a finished run's series, as the charts payload has them
+    function liveFromPayload(payload) {
+        var data = {x: [], y: []};
+        var count = 1;
+        liveSeries.forEach(function (name) {
+            var entry = payload.series[name];
+            var y = Array.from(decode(entry.y));
+            var x = entry.x ? Array.from(decode(entry.x)) : y.map(function (_, i) { return payload.start + i; });
+            data.x.push(x);
+            data.y.push(y);
+            count = Math.max(count, y.length);
+        });
+        return [data, liveSeries.map(function (_, i) { return i; }), count];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        flipsim: {
+            // Apply live chart updates (flipsim.plots.live_update) in order. Dash only hands over the
+            // latest progress value, so on finding one missing ask the worker for the whole run again
+            // (request_resync), and if the run ends first, redraw from the finished charts payload
+            live: function (update, payload) {
+                var triggered = window.dash_clientside.callback_context.triggered.map(function (t) { return t.prop_id; });
+                var none = window.dash_clientside.no_update;
+                if (triggered.indexOf('series-store.data') >= 0) {
+                    var live = payload && payload.live;
+                    if (!live || live.run !== streamed.run || (streamed.seq >= live.seq && !streamed.resync)) {
+                        return [none, none];
+                    }
+                    streamed = {run: live.run, seq: live.seq, resync: false};
+                    return [liveFromPayload(payload), none];
+                }
+                if (!update) {
+                    return [none, none];
+                }
+                var current = update.run === streamed.run;
+                if (update.reset && (!current || update.seq > streamed.seq)) {
+                    streamed = {run: update.run, seq: update.seq, resync: false};
+                    return [update.extend, none];
+                }
+                if (current && !streamed.resync && update.seq === streamed.seq + 1) {
+                    streamed.seq = update.seq;
+                    return [update.extend, none];
+                }
+                if (current && !streamed.resync && update.seq <= streamed.seq) {
+                    return [none, none];
+                }
+                // Asked again with every update until a reset arrives, in case one is missed too
+                streamed = {run: update.run, seq: current ? streamed.seq : -1, resync: true};
+                return [none, {run: update.run, seq: update.seq}];
+            },
+
+            // One figure per chart name, in the order of `names`
+            render: function (payload, scale, names, template) {
+                if (!payload) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                return names.map(function (name) { return charts[name](payload, template, scale); });
+            },
+
+            // Redraw the chart the server sent a window for: zoomed in at full resolution, or whole again
+            zoom: function (view, payload, scale, names, template) {
+                if (!view || !payload) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                return names.map(function (name) {
+                    if (name !== view.chart) {
+                        return window.dash_clientside.no_update;
+                    }
+                    if (!view.window) {
+                        return charts[name](payload, template, scale);
+                    }
+                    var figure = charts[name](view.window, template, scale);
+                    figure.layout.xaxis.range = view.range;
+                    return figure;
+                });
+            },
+
+            // Show the charts ticked in the chart list, hide the others
+            toggle: function (shown, names) {
+                return names.map(function (name) {
+                    return {display: shown.indexOf(name) >= 0 ? 'block' : 'none'};
+                });
+            }
+        }
+    });
+})();
@@ -1,11 +1,21 @@
 # V5 w/ Dashboard
 
+import os
+import uuid
+import diskcache
 import numpy as np
-import random
-import plotly.graph_objects as go
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
+import flask
+import plotly.io as pio
+from dash import ClientsideFunction, DiskcacheManager, ctx, dcc, html
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from flipsim import SERIES_NAMES, SimulationState, locked_flip_exhausted, run_ensemble, stream_simulation
+from flipsim.cache import ResultCache, SqliteStore, cache_key
+from flipsim.meanfield import run_mean_field
+from flipsim.model import stop_index
+from flipsim.plots import BAND_STATS, build_live_figure, encode_results, live_update
+from flipsim.profiling import Profile, phase
 
 # Simulation Parameters
 initial_days = 365 * 2  # Total simulation days
@@ -23,252 +33,425 @@ initial_complex_nfts = 0  # Starting total complex NFTs created
 # Complex NFT Creation Parameters
 initial_complex_nft_creation_percentage = 0.005  # Percentage of players who create complex NFTs each day
 
+# Monte Carlo Parameters
+initial_replicas = 1  # Independent runs to average; above 1 the charts show p5-p95 bands
+initial_seed = 0  # Random seed, so a parameter set always gives the same (cacheable) result
+initial_engine = 'stochastic'  # 'mean-field' approximates the ensemble mean in a few milliseconds
+initial_stop_early = []  # ['locked_flip_exhausted'] ends a single run once no FLIP is locked
+
+# Result Cache (remembers every parameter set already simulated, also across restarts)
+cache_max_bytes = 64 * 2**20  # Memory budget per process; runs end with their job process, so it mostly serves zooms
+cache_disk_max_bytes = 2 * 2**30  # Disk budget for stored results, least recently used dropped first
+cache_max_age = 7 * 24 * 3600  # Seconds a stored result is kept without being used
+cache_dir = os.environ.get('FLIP_SIM_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sim_cache'))
+# Every worker process reads and writes the same SQLite file, so a run made for one session is reused by all;
+# only this tier is shared, as each process keeps its own in-memory tier
+result_cache = ResultCache(max_bytes=cache_max_bytes, store=SqliteStore(
+    os.path.join(cache_dir, 'results.sqlite'), max_bytes=cache_disk_max_bytes, max_age=cache_max_age,
+))
+
+# Background Runs (each simulation runs in its own process; a superseded run is terminated)
+progress_updates = 100  # Progress bar updates per run (a single run is also streamed to the live chart in as many chunks)
+job_expire = 10 * 60  # Seconds a finished run's payload is kept for the page that asked for it
+
+# Performance Panel (time spent per phase of the last update; the day loop takes no timings when off)
+profile_runs = True
+
+# Charts shown, in order, with their labels in the chart list (drawn by assets/flipsim_charts.js)
+dashboard_charts = ['pie', 'flip', 'unlocked_flip', 'locked_flip', 'basic_nfts', 'complex_nfts', 'players']
+chart_labels = {
+    'pie': 'Locked vs Unlocked', 'flip': 'FLIP Supply', 'unlocked_flip': 'Unlocked FLIP', 'locked_flip': 'Locked FLIP',
+    'basic_nfts': 'Basic NFTs', 'cumulative_nfts': 'Cumulative Basic NFTs', 'complex_nfts': 'Complex NFTs', 'players': 'Players',
+}
+zoomable_charts = [name for name in dashboard_charts if name != 'pie']  # Charts re-fetched at full resolution on zoom
+# Jobs are keyed by page load as well as inputs: sessions sending the same inputs would otherwise share one
+# job entry, and the first to collect it would leave the others without a result (runs are shared by result_cache)
+job_cache = diskcache.Cache(os.path.join(cache_dir, 'jobs'))  # Also carries live chart resync requests to the workers
+background_callback_manager = DiskcacheManager(
+    job_cache, cache_by=[lambda: flask.request.args.get('endId')], expire=job_expire,
+)
+
 # Helper Functions
-def logistic_growth(t, P_0, K, r):
-    """Logistic growth model for player population."""
-    return K / (1 + ((K - P_0) / P_0) * np.exp(-r * t))
-
-def mint_flip_tokens(puzzle_type):
-    """Mint FLIP tokens based on puzzle type solved."""
-    return 1 if puzzle_type == '4x4' else 4
-
-def determine_max_canvas_size(total_basic_nfts):
-    """Determine max canvas size based on total basic NFTs created."""
-    return '8x8' if total_basic_nfts >= 1000 else '4x4'
-
-def nfts_used_for_complex(mean, std_dev):
-    """Determine number of basic NFTs used for a complex NFT based on normal distribution."""
-    nfts_used = int(np.random.normal(mean, std_dev))
-    # Ensure the number of NFTs used is at least 1 and not more than the mean + 3*std_dev
-    return max(1, min(nfts_used, mean + 3 * std_dev))
-
-def create_basic_nfts(day, initial_supply, growth_rate):
-    """Realistically create basic NFTs over time."""
-    # Assuming a linear increase over time, could be modified for other growth patterns
-    return initial_supply + day * growth_rate
-
-def run_simulation(days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip, basic_nfts, complex_nfts, complex_nft_creation_percentage):
-    total_basic_nfts_created = sum(basic_nfts.values())  # Total number of basic NFTs ever created
-
-    # Tracking Arrays
-    daily_flip_supply = np.zeros(days)
-    daily_locked_flip = np.zeros(days)  # Tracking locked FLIP
-    daily_basic_nfts_4x4 = np.zeros(days)
-    daily_basic_nfts_8x8 = np.zeros(days)
-    daily_complex_nfts = np.zeros(days)
-    daily_players = np.zeros(days)
-
-    # New tracking arrays for cumulative basic NFTs
-    cumulative_basic_nfts_4x4 = np.zeros(days)
-    cumulative_basic_nfts_8x8 = np.zeros(days)
-
-    # Simulation Loop
-    for day in range(days):
-        # Update players using logistic growth model
-        players = logistic_growth(day, P_0, K, r)
-        daily_players[day] = players
-
-        # New code to update cumulative basic NFTs
-        if day == 0:
-            cumulative_basic_nfts_4x4[day] = basic_nfts['4x4']
-            cumulative_basic_nfts_8x8[day] = basic_nfts['8x8']
+def simulate(params, seed, replicas, engine='stochastic', progress=None, profile=None, stop=None, live=None):
+    """Return the daily series for a parameter set, from the cache when it was seen before.
+
+    A single stochastic run streams: live, if given, is called with the results so far
+    after every chunk, and stop can end the run early (see flipsim.stream_simulation).
+    """
+    if engine == 'mean-field':
+        # Takes a few milliseconds, so it is not worth caching
+        with phase(profile, 'mean_field'):
+            return dict(zip(SERIES_NAMES, run_mean_field(**params)))
+    if replicas <= 1:
+        return simulate_horizon(params, seed, progress, profile, stop, live)
+    def compute():
+        with phase(profile, 'ensemble'):
+            return run_ensemble(params, replicas, seed=seed, progress=progress)
+    return result_cache.get_or_compute(cache_key(params, seed, replicas=replicas), compute, profile)
+
+def simulate_horizon(params, seed, progress=None, profile=None, stop=None, live=None):
+    """Single-run series, reusing the longest cached run with the same parameters and seed.
+
+    Runs are cached without their length, together with the final snapshot, so a longer
+    horizon only simulates the extra days and a shorter one is a slice of what is stored.
+    With stop, the series end on the first day it holds. Processes sharing the result
+    store wait for one another's run of the same parameters instead of repeating it.
+    """
+    days = params['days']
+    key = cache_key({name: value for name, value in params.items() if name != 'days'}, seed, horizon=True)
+
+    def cached():
+        stored = result_cache.get(key, profile)
+        if stored is not None:
+            end = stop_index(stored, stop) if stop is not None else None
+            if end is not None or len(stored['players']) >= days:
+                return stored, {name: stored[name][:min(end or days, days)] for name in SERIES_NAMES}
+        return stored, None
+
+    stored, results = cached()
+    if results is None:
+        # Another worker may be running the same parameters; wait for its run rather than repeating it
+        with result_cache.computing(key):
+            stored, results = cached()
+            if results is None:
+                results = extend_horizon(key, stored, params, seed, progress, profile, stop, live)
+    return results
+
+def extend_horizon(key, stored, params, seed, progress=None, profile=None, stop=None, live=None):
+    """Simulate what the stored run (or None) lacks of params['days'] and store the longer run."""
+    days = params['days']
+    if stored is None:
+        state = SimulationState.start(params['flip_supply'], params['locked_flip'], params['basic_nfts'], params['complex_nfts'])
+        rng = np.random.default_rng(seed)
+        stored = {name: np.zeros(0) for name in SERIES_NAMES}
+    else:
+        state = SimulationState.from_dict(stored['state'])
+        rng = state.make_rng()
+
+    parts = {name: [stored[name]] for name in SERIES_NAMES}
+    remaining, done = days - state.day, 0
+    for series, state in stream_simulation(
+        state, remaining, params['P_0'], params['K'], params['r'], params['daily_active_percentage'],
+        params['complex_nft_creation_percentage'], rng=rng, chunk_days=max(remaining // progress_updates, 1),
+        stop=stop, profile=profile,
+    ):
+        for name, new in zip(SERIES_NAMES, series):
+            parts[name].append(new)
+        done += len(series[0])
+        if live is not None:
+            live({name: np.concatenate(parts[name]) for name in SERIES_NAMES})
+        elif progress is not None:
+            progress(done, remaining)
+
+    results = {name: np.concatenate(parts[name]) for name in SERIES_NAMES}
+    result_cache.put(key, {**results, 'state': state.to_dict()}, profile)
+    end = stop_index(results, stop) if stop is not None else None
+    return {name: results[name][:end or days] for name in SERIES_NAMES}
+
+def store_view(results, ensemble, params, seed, profile=None, **options):
+    """Keep what the charts show in the result cache, so zooming can fetch any window of it."""
+    key = cache_key(params, seed, view=True, **options)
+    view = {'mean': results}
+    if ensemble is not None:
+        view.update({stat: {name: ensemble[name][stat] for name in SERIES_NAMES} for stat in BAND_STATS})
+    result_cache.put(key, view, profile)
+    return key
+
+def view_window(key, first, last):
+    """encode_results of days first..last (inclusive) of a stored view, or None if it is gone."""
+    view = result_cache.get(key)
+    if view is None:
+        return None
+    days = len(view['mean']['players'])
+    start, stop = max(int(first), 0), min(int(last) + 2, days)
+    if start >= stop:
+        return None
+    results = {name: view['mean'][name][start:stop] for name in SERIES_NAMES}
+    ensemble = None
+    if 'p5' in view:
+        ensemble = {name: {stat: view[stat][name][start:stop] for stat in BAND_STATS} for name in SERIES_NAMES}
+    return encode_results(results, ensemble, start=start)
+
+def performance_table(profile):
+    """Rows of the performance panel, slowest phase first."""
+    header = html.Tr([html.Th('Phase'), html.Th('Total (ms)'), html.Th('Calls'), html.Th('Per call (µs)')])
+    rows = [
+        html.Tr([html.Td(name), html.Td(f'{seconds * 1000:.2f}'), html.Td(calls), html.Td(f'{per_call:.1f}')])
+        for name, seconds, calls, per_call in profile.rows()
+    ]
+    return html.Table([header, *rows])
+
+def throttled_progress(set_progress):
+    """Forward (done, total) progress to Dash only about progress_updates times per run."""
+    def report(done, total):
+        step = max(total // progress_updates, 1)
+        if done % step == 0 or done == total:
+            set_progress((done, total, f'Simulated {done} of {total}', dash.no_update))
+    return report
+
+def live_progress(set_progress, days, run):
+    """Stream a single run's results so far to the live chart, with the progress bar.
+
+    Returns report(results, status=None), which sends the days added since its previous
+    call as the next numbered update of `run` (see live_update) and returns that number.
+    The browser only sees the latest progress value, so when it finds an update missing it
+    asks for the run again (request_resync) and the next update resends all of it. With a
+    status, the progress bar shows it as finished.
+    """
+    seq, sent = -1, 0
+
+    def report(results, status=None):
+        nonlocal seq, sent
+        done = len(results['players'])
+        update = dash.no_update
+        if seq < 0 or done != sent:
+            reset = seq < 0 or done < sent or job_cache.pop(('live-resync', run)) is not None
+            seq += 1
+            update = live_update(results, run, seq, 0 if reset else sent, days)
+            sent = done
+        if status is None:
+            set_progress((done, days, f'Simulated {done} of {days}', update))
         else:
-            cumulative_basic_nfts_4x4[day] = cumulative_basic_nfts_4x4[day - 1] + basic_nfts['4x4']
-            cumulative_basic_nfts_8x8[day] = cumulative_basic_nfts_8x8[day - 1] + basic_nfts['8x8']
-
-        # Determine the number of active players based on some percentage
-        active_players = int(players * daily_active_percentage)
-
-        # Daily puzzle solving and FLIP minting (locked)
-        for _ in range(active_players):
-            puzzle_type = random.choice(['4x4', '8x8'])
-            flip_minted = mint_flip_tokens(puzzle_type)
-            basic_nfts[puzzle_type] -= flip_minted
-            locked_flip += flip_minted
-            total_basic_nfts_created += flip_minted
-
-            # Ensure we don't go negative on the basic NFT counts
-            basic_nfts['4x4'] = max(basic_nfts['4x4'], 0)
-            basic_nfts['8x8'] = max(basic_nfts['8x8'], 0)
-
-        # Create new basic NFTs realistically over time
-        basic_nfts['4x4'] += create_basic_nfts(day, 1, 0.05)  # Example growth rate
-        basic_nfts['8x8'] += create_basic_nfts(day, 0.5, 0.025)  # Example growth rate
-
-        # Complex NFT Creation Logic
-        complex_nft_creators = int(players * complex_nft_creation_percentage)
-        max_canvas_size = determine_max_canvas_size(total_basic_nfts_created)
-
-        for _ in range(complex_nft_creators):
-            # Determine the number of basic NFTs used for a complex NFT
-            nfts_used = nfts_used_for_complex(32, 10)
-            nft_used = '8x8' if max_canvas_size == '8x8' and basic_nfts['8x8'] >= nfts_used else '4x4'
-
-            if basic_nfts[nft_used] >= nfts_used:
-                basic_nfts[nft_used] -= nfts_used
-                flip_supply += mint_flip_tokens(nft_used) * nfts_used
-                locked_flip -= mint_flip_tokens(nft_used) * nfts_used
-                complex_nfts += 1  # Increment complex NFT count
-
-        # Prevent negative numbers
-        flip_supply = max(flip_supply, 0)
-        locked_flip = max(locked_flip, 0)
-        complex_nfts = max(complex_nfts, 0)
-
-        # Update daily metrics
-        daily_flip_supply[day] = flip_supply
-        daily_locked_flip[day] = locked_flip
-        daily_basic_nfts_4x4[day] = basic_nfts['4x4']
-        daily_basic_nfts_8x8[day] = basic_nfts['8x8']
-        daily_complex_nfts[day] = complex_nfts
-
-    return daily_flip_supply, daily_locked_flip, daily_basic_nfts_4x4, daily_basic_nfts_8x8, daily_complex_nfts, daily_players, cumulative_basic_nfts_4x4, cumulative_basic_nfts_8x8
+            set_progress((1, 1, status, update))
+        return seq
+    return report
 
 # Dash App
-app = dash.Dash(__name__)
-
-app.layout = html.Div([
+layout = html.Div([
     html.H1('Simulation Dashboard'),
     html.Div([
         html.Label('Total Simulation Days'),
-        dcc.Input(id='days-input', type='number', value=initial_days),
+        dcc.Input(id='days-input', type='number', value=initial_days, debounce=True),
     ]),
     html.Div([
         html.Label('Initial Number of Players'),
-        dcc.Input(id='p0-input', type='number', value=initial_P_0),
+        dcc.Input(id='p0-input', type='number', value=initial_P_0, debounce=True),
     ]),
     html.Div([
         html.Label('Carrying Capacity'),
-        dcc.Input(id='k-input', type='number', value=initial_K),
+        dcc.Input(id='k-input', type='number', value=initial_K, debounce=True),
     ]),
     html.Div([
         html.Label('Growth Rate'),
-        dcc.Input(id='r-input', type='number', value=initial_r),
+        dcc.Input(id='r-input', type='number', value=initial_r, debounce=True),
     ]),
     html.Div([
         html.Label('Average Active % of Users'),
-        dcc.Input(id='daily-active-percentage-input', type='number', value=initial_daily_active_percentage),
+        dcc.Input(id='daily-active-percentage-input', type='number', value=initial_daily_active_percentage, debounce=True),
     ]),
     html.Div([
         html.Label('Starting Available FLIP Supply'),
-        dcc.Input(id='flip-supply-input', type='number', value=initial_flip_supply),
+        dcc.Input(id='flip-supply-input', type='number', value=initial_flip_supply, debounce=True),
     ]),
     html.Div([
         html.Label('Starting Locked FLIP'),
-        dcc.Input(id='locked-flip-input', type='number', value=initial_locked_flip),
+        dcc.Input(id='locked-flip-input', type='number', value=initial_locked_flip, debounce=True),
     ]),
     html.Div([
         html.Label('Starting Total 4x4 Basic NFTs'),
-        dcc.Input(id='basic-nfts-4x4-input', type='number', value=initial_basic_nfts['4x4']),
+        dcc.Input(id='basic-nfts-4x4-input', type='number', value=initial_basic_nfts['4x4'], debounce=True),
     ]),
     html.Div([
         html.Label('Starting Total 8x8 Basic NFTs'),
-        dcc.Input(id='basic-nfts-8x8-input', type='number', value=initial_basic_nfts['8x8']),
+        dcc.Input(id='basic-nfts-8x8-input', type='number', value=initial_basic_nfts['8x8'], debounce=True),
     ]),
     html.Div([
         html.Label('Starting Total Complex NFTs'),
-        dcc.Input(id='complex-nfts-input', type='number', value=initial_complex_nfts),
+        dcc.Input(id='complex-nfts-input', type='number', value=initial_complex_nfts, debounce=True),
     ]),
     html.Div([
         html.Label('Complex NFT Creation Percentage'),
-        dcc.Input(id='complex-nft-creation-percentage-input', type='number', value=initial_complex_nft_creation_percentage),
+        dcc.Input(id='complex-nft-creation-percentage-input', type='number', value=initial_complex_nft_creation_percentage, debounce=True),
+    ]),
+    html.Div([
+        html.Label('Monte Carlo Replicas'),
+        dcc.Input(id='replicas-input', type='number', value=initial_replicas, debounce=True),
+    ]),
+    html.Div([
+        html.Label('Engine'),
+        dcc.RadioItems(id='engine-input', options=[
+            {'label': 'Stochastic', 'value': 'stochastic'},
+            {'label': 'Mean-field (approximate)', 'value': 'mean-field'},
+        ], value=initial_engine, inline=True),
+        html.Small('Mean-field tracks the mean of 100 stochastic runs within 1% for FLIP balances, about 15% for '
+                   'the basic NFT pools and about 12% for complex NFTs, when checked with `python -m flipsim validate`.',
+                   style={'margin': '0 10px'}),
+    ]),
+    html.Div([
+        html.Label('Random Seed'),
+        dcc.Input(id='seed-input', type='number', value=initial_seed, debounce=True),
+    ]),
+    html.Div([
+        dcc.Checklist(id='stop-input', options=[
+            {'label': 'Stop a single run early when locked FLIP runs out', 'value': 'locked_flip_exhausted'},
+        ], value=initial_stop_early),
     ]),
-    html.Div(id='charts')
+    html.Div([
+        html.Progress(id='simulation-progress', value='0', max='1'),
+        html.Span(id='simulation-status', style={'margin': '0 10px'}),
+        html.Button('Cancel', id='cancel-button', disabled=True),
+    ]),
+    html.Details([
+        html.Summary('Performance'),
+        html.Div(id='performance'),
+    ]),
+    dcc.Graph(id='live-chart', figure=build_live_figure()),
+    html.Div([
+        dcc.Checklist(id='chart-toggle', options=[{'label': chart_labels[name], 'value': name} for name in dashboard_charts],
+                      value=dashboard_charts, inline=True),
+        dcc.RadioItems(id='yaxis-scale', options=[{'label': 'Linear', 'value': 'linear'}, {'label': 'Log', 'value': 'log'}],
+                       value='linear', inline=True),
+    ]),
+    # The results are sent once, as typed arrays, and the charts are drawn from them in the browser
+    dcc.Store(id='series-store'),
+    dcc.Store(id='live-store'),
+    dcc.Store(id='live-resync'),
+    dcc.Store(id='window-store'),
+    dcc.Store(id='chart-names', data=dashboard_charts),
+    dcc.Store(id='figure-template', data=pio.templates[pio.templates.default].to_plotly_json()),
+    html.Div([html.Div(dcc.Graph(id=f'{name}-chart'), id=f'{name}-chart-box') for name in dashboard_charts], id='charts')
 ])
 
-@app.callback(
-    Output('charts', 'children'),
-    [Input('days-input', 'value'),
-     Input('p0-input', 'value'),
-     Input('k-input', 'value'),
-     Input('r-input', 'value'),
-     Input('daily-active-percentage-input', 'value'),
-     Input('flip-supply-input', 'value'),
-     Input('locked-flip-input', 'value'),
-     Input('basic-nfts-4x4-input', 'value'),
-     Input('basic-nfts-8x8-input', 'value'),
-     Input('complex-nfts-input', 'value'),
-     Input('complex-nft-creation-percentage-input', 'value')]
-)
-def update_charts(days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip,
-                  basic_nfts_4x4, basic_nfts_8x8, complex_nfts, complex_nft_creation_percentage):
-    basic_nfts = {'4x4': basic_nfts_4x4, '8x8': basic_nfts_8x8}
+def register_callbacks(app):
+    """Attach the dashboard's server-side and clientside callbacks to a Dash app."""
+
+    @app.callback(
+        [Output('series-store', 'data'),
+         Output('performance', 'children')],
+        [Input('days-input', 'value'),
+         Input('p0-input', 'value'),
+         Input('k-input', 'value'),
+         Input('r-input', 'value'),
+         Input('daily-active-percentage-input', 'value'),
+         Input('flip-supply-input', 'value'),
+         Input('locked-flip-input', 'value'),
+         Input('basic-nfts-4x4-input', 'value'),
+         Input('basic-nfts-8x8-input', 'value'),
+         Input('complex-nfts-input', 'value'),
+         Input('complex-nft-creation-percentage-input', 'value'),
+         Input('replicas-input', 'value'),
+         Input('seed-input', 'value'),
+         Input('engine-input', 'value'),
+         Input('stop-input', 'value')],
+        background=True,
+        progress=[Output('simulation-progress', 'value'),
+                  Output('simulation-progress', 'max'),
+                  Output('simulation-status', 'children'),
+                  Output('live-store', 'data')],
+        running=[(Output('cancel-button', 'disabled'), False, True)],
+        cancel=[Input('cancel-button', 'n_clicks')],
+    )
+    def update_charts(set_progress, days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip,
+                      basic_nfts_4x4, basic_nfts_8x8, complex_nfts, complex_nft_creation_percentage, replicas, seed, engine, stop_early):
+        basic_nfts = {'4x4': basic_nfts_4x4, '8x8': basic_nfts_8x8}
+        params = dict(
+            days=int(days), P_0=P_0, K=K, r=r, daily_active_percentage=daily_active_percentage,
+            flip_supply=flip_supply, locked_flip=locked_flip, basic_nfts=basic_nfts,
+            complex_nfts=complex_nfts, complex_nft_creation_percentage=complex_nft_creation_percentage,
+        )
+
+        replicas = 1 if engine == 'mean-field' else max(int(replicas or 1), 1)
+        profile = Profile() if profile_runs else None
+        stop = locked_flip_exhausted if 'locked_flip_exhausted' in (stop_early or []) else None
+        run = uuid.uuid4().hex
+        live = live_progress(set_progress, params['days'], run)
+        with phase(profile, 'simulate'):
+            results = simulate(params, int(seed or 0), replicas, engine, progress=throttled_progress(set_progress),
+                               profile=profile, stop=stop, live=live)
+
+        # Several replicas are drawn as their mean, with percentile bands added to each chart
+        ensemble = None
+        if replicas > 1:
+            ensemble = results
+            results = {name: ensemble[name]['mean'] for name in SERIES_NAMES}
+        live_seq = live(results, 'Rendering charts')
+
+        with phase(profile, 'encode'):
+            payload = encode_results(results, ensemble)
+        # A browser that missed the last live updates redraws the live chart from the payload
+        payload['live'] = {'run': run, 'seq': live_seq}
+        payload['key'] = store_view(results, ensemble, params, seed, profile, replicas=replicas, engine=engine, stop=stop_early)
+        performance = performance_table(profile) if profile is not None else 'Profiling is off (profile_runs = False).'
+        return payload, performance
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='flipsim', function_name='live'),
+        [Output('live-chart', 'extendData'),
+         Output('live-resync', 'data')],
+        [Input('live-store', 'data'),
+         Input('series-store', 'data')],
+        prevent_initial_call=True,
+    )
 
-    daily_flip_supply, daily_locked_flip, daily_basic_nfts_4x4, daily_basic_nfts_8x8, daily_complex_nfts, daily_players, cumulative_basic_nfts_4x4, cumulative_basic_nfts_8x8 = run_simulation(
-        days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip, basic_nfts, complex_nfts, complex_nft_creation_percentage
+    @app.callback(Input('live-resync', 'data'), prevent_initial_call=True)
+    def request_resync(request):
+        """Have the worker streaming request['run'] resend the whole run with its next update."""
+        job_cache.set(('live-resync', request['run']), True, expire=job_expire)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='flipsim', function_name='render'),
+        [Output(f'{name}-chart', 'figure') for name in dashboard_charts],
+        [Input('series-store', 'data'),
+         Input('yaxis-scale', 'value')],
+        [State('chart-names', 'data'),
+         State('figure-template', 'data')],
     )
 
-    # Final Day Pie Chart Data
-    final_day_unlocked_flip = daily_flip_supply[-1]
-    final_day_locked_flip = daily_locked_flip[-1]
-
-    # Pie Chart for Locked vs Unlocked FLIP
-    pie_fig = go.Figure(data=[go.Pie(
-        labels=['Unlocked', 'Locked'],
-        values=[final_day_unlocked_flip, final_day_locked_flip],
-        title='Locked vs Unlocked FLIP',
-        textinfo='percent+label',
-        pull=[0.1, 0],  # Slightly pull out the largest section
-        hoverinfo='label+percent',  # Show label and percent on hover
-        direction='clockwise',  # Ensure the layout is ordered clockwise
-        sort=False,  # Don't sort the values
-        insidetextorientation='radial'  # Arrange text to avoid overlap
-    )])
-
-    # Update traces to set the text position to outside and add connector lines
-    pie_fig.update_traces(
-        textposition='outside',
-        textfont_size=8,
-        marker=dict(line=dict(color='#000000', width=1))
+    @app.callback(
+        Output('window-store', 'data'),
+        [Input(f'{name}-chart', 'relayoutData') for name in zoomable_charts],
+        State('series-store', 'data'),
+        prevent_initial_call=True,
+    )
+    def zoom_window(*args):
+        """Full-resolution data for the window a chart was zoomed to, or a reset when zoomed out."""
+        *relayouts, payload = args
+        chart = ctx.triggered_id.removesuffix('-chart')
+        relayout = relayouts[zoomable_charts.index(chart)] or {}
+        if payload is None:
+            raise PreventUpdate
+        if relayout.get('xaxis.autorange'):
+            return {'chart': chart}
+        window = relayout.get('xaxis.range') or [relayout.get('xaxis.range[0]'), relayout.get('xaxis.range[1]')]
+        if window[0] is None or window[1] is None:
+            raise PreventUpdate
+        # Only a horizon that arrived downsampled has more to show
+        if all('x' not in entry for entry in payload['series'].values()):
+            raise PreventUpdate
+        data = view_window(payload['key'], *window)
+        if data is None:
+            raise PreventUpdate
+        return {'chart': chart, 'range': window, 'window': data}
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='flipsim', function_name='zoom'),
+        [Output(f'{name}-chart', 'figure', allow_duplicate=True) for name in dashboard_charts],
+        [Input('window-store', 'data')],
+        [State('series-store', 'data'),
+         State('yaxis-scale', 'value'),
+         State('chart-names', 'data'),
+         State('figure-template', 'data')],
+        prevent_initial_call=True,
     )
 
-    # Update the layout to adjust the pie chart size, margins, and domain
-    pie_fig.update_layout(
-        height=600,  # Height of the pie chart
-        width=2100,  # Width to match the line graph width
-        showlegend=False,  # Hide the legend if needed
-        title_y=0.95  # Vertically raise the title by 50 pixels
+    app.clientside_callback(
+        ClientsideFunction(namespace='flipsim', function_name='toggle'),
+        [Output(f'{name}-chart-box', 'style') for name in dashboard_charts],
+        [Input('chart-toggle', 'value')],
+        [State('chart-names', 'data')],
     )
 
-    # Separate charts for Locked and Unlocked FLIP supply
-    flip_fig = go.Figure()
-    flip_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_flip_supply, mode='lines', name='Unlocked FLIP Supply'))
-    flip_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_locked_flip, mode='lines', name='Locked FLIP'))
-    flip_fig.update_layout(title='FLIP Supply Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='FLIP Type')
-
-    # New separate charts for Unlocked and Locked FLIP supply
-    unlocked_flip_fig = go.Figure()
-    unlocked_flip_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_flip_supply, mode='lines', name='Unlocked FLIP Supply'))
-    unlocked_flip_fig.update_layout(title='Unlocked FLIP Supply Over Time', xaxis_title='Day', yaxis_title='Count')
-
-    locked_flip_fig = go.Figure()
-    locked_flip_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_locked_flip, mode='lines', name='Locked FLIP'))
-    locked_flip_fig.update_layout(title='Locked FLIP Over Time', xaxis_title='Day', yaxis_title='Count')
-
-    # Separate chart for basic NFTs
-    basic_nft_fig = go.Figure()
-    basic_nft_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_basic_nfts_4x4, mode='lines', name='4x4 Basic NFTs'))
-    basic_nft_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_basic_nfts_8x8, mode='lines', name='8x8 Basic NFTs'))
-    basic_nft_fig.update_layout(title='Basic NFT Creation Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='NFT Type')
-
-    # New separate chart for complex NFTs
-    complex_nft_fig = go.Figure()
-    complex_nft_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_complex_nfts, mode='lines', name='Complex NFTs'))
-    complex_nft_fig.update_layout(title='Complex NFT Creation Over Time', xaxis_title='Day', yaxis_title='Count')
-
-    player_fig = go.Figure()
-    player_fig.add_trace(go.Scatter(x=np.arange(days), y=daily_players, mode='lines', name='Player Growth'))
-    player_fig.update_layout(title='Player Growth Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='Metric')
-
-    return [
-        dcc.Graph(figure=pie_fig),
-        dcc.Graph(figure=flip_fig),
-        dcc.Graph(figure=unlocked_flip_fig),
-        dcc.Graph(figure=locked_flip_fig),
-        dcc.Graph(figure=basic_nft_fig),
-        dcc.Graph(figure=complex_nft_fig),
-        dcc.Graph(figure=player_fig)
-    ]
+def create_app():
+    """A new dashboard app, with Dash's debug tooling off; run it with app.run() or serve app.server."""
+    app = dash.Dash(__name__, background_callback_manager=background_callback_manager)
+    app.layout = layout
+    register_callbacks(app)
+    return app
+
+def create_server():
+    """WSGI app factory for production, e.g. gunicorn --workers 4 'flip_sim_dash:create_server()'."""
+    return create_app().server
 
 if __name__ == '__main__':
-    app.run_server(debug=True, use_reloader=False)
+    # Development server, one process with Dash's debug tooling; see the README for serving several users
+    create_app().run(debug=True, use_reloader=False)
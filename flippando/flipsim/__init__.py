@@ -0,0 +1,7 @@
+"""Importable core of the Flippando FLIP tokenomics simulation."""
+
+from .ensemble import PERCENTILES, run_ensemble
+from .model import (
+    DEFAULT_PARAMS, SERIES_NAMES, SimulationState, advance, locked_flip_exhausted, run_simulation,
+    stream_simulation,
+)
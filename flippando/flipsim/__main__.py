@@ -0,0 +1,235 @@
+"""Headless command line for the simulation: python -m flipsim run|validate|bench|startup --help."""
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from .ensemble import run_ensemble
+from .model import DEFAULT_PARAMS, SERIES_NAMES, run_simulation
+
+# Modules that should never be loaded unless a chart or table is asked for
+HEAVY_MODULES = ('plotly', 'dash', 'pandas')
+
+
+def flatten(results):
+    """{name: array} from a run, or {name_stat: array} from an ensemble."""
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update({f'{name}_{stat}': v for stat, v in value.items()})
+        else:
+            flat[name] = value
+    return flat
+
+
+def write_results(results, path):
+    """Write results as .npz, or as .parquet (one column per series, one row per day)."""
+    flat = flatten(results)
+    if path.endswith('.parquet'):
+        import pandas as pd
+
+        pd.DataFrame(flat).rename_axis('day').to_parquet(path)
+    else:
+        np.savez_compressed(path, **flat)
+
+
+def params_from(args):
+    return dict(
+        days=args.days,
+        P_0=args.P_0,
+        K=args.K,
+        r=args.r,
+        daily_active_percentage=args.daily_active_percentage,
+        flip_supply=args.flip_supply,
+        locked_flip=args.locked_flip,
+        basic_nfts={'4x4': args.basic_nfts_4x4, '8x8': args.basic_nfts_8x8},
+        complex_nfts=args.complex_nfts,
+        complex_nft_creation_percentage=args.complex_nft_creation_percentage,
+    )
+
+
+def run(args):
+    params = params_from(args)
+    profile = None
+    if args.profile:
+        from .profiling import Profile
+
+        profile = Profile()
+    start = time.perf_counter()
+    if args.agents:
+        from .agents import METRIC_NAMES, run_agents
+        from .profiling import phase
+
+        with phase(profile, 'agents'):
+            series, metrics, players = run_agents(**params, rng=args.seed, churn_rate=args.churn_rate, metrics_every=args.metrics_every)
+        results = {**dict(zip(SERIES_NAMES, series)), **metrics}
+        means = results
+    elif args.tau_leap:
+        from .profiling import phase
+        from .tauleap import run_tau_leaping
+
+        with phase(profile, 'tau_leap'):
+            series, steps = run_tau_leaping(**params, rng=args.seed, epsilon=args.epsilon)
+        results = dict(zip(SERIES_NAMES, series))
+        means = results
+    elif args.mean_field:
+        from .meanfield import run_mean_field
+        from .profiling import phase
+
+        with phase(profile, 'mean_field'):
+            results = dict(zip(SERIES_NAMES, run_mean_field(**params)))
+        means = results
+    elif args.replicas > 1:
+        from .profiling import phase
+
+        with phase(profile, 'ensemble'):
+            results = run_ensemble(params, args.replicas, seed=args.seed, max_workers=args.workers)
+        means = {name: results[name]['mean'] for name in SERIES_NAMES}
+    else:
+        simulate = partial(run_simulation, **params, rng=np.random.default_rng(args.seed), jit=args.jit, profile=profile)
+        if args.cprofile:
+            from .profiling import dump_cprofile
+
+            series = dump_cprofile(args.cprofile, simulate)
+        else:
+            series = simulate()
+        results = dict(zip(SERIES_NAMES, series))
+        means = results
+    elapsed = time.perf_counter() - start
+
+    print(f'{args.days} days x {args.replicas} replica(s) in {elapsed:.3f}s: '
+          f'final unlocked FLIP {means["flip_supply"][-1]:,.0f}, locked FLIP {means["locked_flip"][-1]:,.0f}')
+    if args.agents:
+        print(f'{players.count:,} players ({players.nbytes / 2**20:.0f} MB): Gini {metrics["gini"][-1]:.3f}, '
+              f'top 1% hold {metrics["top_1pct_share"][-1]:.1%}, {metrics["churned"][-1]:,.0f} churned')
+        means = {name: results[name] for name in SERIES_NAMES}
+    if args.tau_leap:
+        print(f'{steps.sum():,} steps, {steps.mean():.2f} per day on average, {(steps == steps.max()).sum():,} day(s) at {steps.max()}')
+    if args.cprofile:
+        print(f'Wrote cProfile stats to {args.cprofile}')
+    if args.out:
+        write_results(results, args.out)
+        print(f'Wrote {args.out}')
+    if args.plot:
+        from .plots import build_figures
+        from .profiling import phase
+
+        with phase(profile, 'build_figures'):
+            figures = build_figures(means, results if args.replicas > 1 else None)
+        for fig in figures.values():
+            fig.show()
+    if profile is not None:
+        print(profile.table())
+
+
+def validate(args):
+    """Print how far the mean-field trajectory is from the mean of a stochastic ensemble."""
+    from .meanfield import validate_mean_field
+
+    report = validate_mean_field(params_from(args), replicas=args.replicas, seed=args.seed, max_workers=args.workers)
+    print(f'Mean-field vs mean of {args.replicas} stochastic runs (error relative to the series peak)')
+    print(f'{"series":<28}{"max error":>12}{"final error":>14}')
+    for name, errors in report.items():
+        print(f'{name:<28}{errors["max_error"]:>12.2%}{errors["final_error"]:>14.2%}')
+
+
+def bench(args):
+    """Run the benchmark suite, optionally store it and compare it with a stored result."""
+    from . import bench as suite
+
+    def report(name, measured):
+        print(f'{name:<38}{measured["seconds"] * 1000:>12.2f} ms{measured["peak_bytes"] / 2**20:>10.2f} MiB')
+
+    print(f'{"case":<38}{"median":>15}{"peak":>14}')
+    results = suite.run_benchmarks(repeat=args.repeat, seed=args.seed, jit=args.jit, figures=not args.no_figures, progress=report)
+    if args.out:
+        suite.save(results, args.out)
+        print(f'Wrote {args.out}')
+    if args.compare:
+        print(f'\nAgainst {args.compare}:')
+        for name, before, after, ratio, flag in suite.compare(suite.load(args.compare), results, args.threshold):
+            print(f'{name:<38}{before * 1000:>12.2f} ms{after * 1000:>12.2f} ms{ratio:>8.2f}x  {flag}')
+
+
+def startup(args):
+    """Time cold imports of the CLI in fresh interpreters and check no heavy module comes along."""
+    import statistics
+    import subprocess
+
+    probe = (
+        'import sys, time; start = time.perf_counter(); import flipsim.__main__; '
+        'print(time.perf_counter() - start); '
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(__file__)), os.environ.get('PYTHONPATH')])))
+    imports, totals, heavy = [], [], set()
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', probe], env=env, capture_output=True, text=True, check=True).stdout.splitlines()
+        totals.append(time.perf_counter() - start)
+        imports.append(float(out[0]))
+        heavy.update(filter(None, out[1].split(',')))
+    print(f'import flipsim: {statistics.median(imports) * 1000:.1f} ms median, '
+          f'interpreter + import: {statistics.median(totals) * 1000:.1f} ms median over {args.repeat} runs')
+    print(f'heavy modules loaded: {", ".join(sorted(heavy)) or "none"}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m flipsim', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_model_arguments(command):
+        for name, value in DEFAULT_PARAMS.items():
+            if name == 'basic_nfts':
+                for size, count in value.items():
+                    command.add_argument(f'--basic-nfts-{size}', type=type(count), default=count)
+            else:
+                command.add_argument(f'--{name.replace("_", "-")}', dest=name, type=type(value), default=value)
+        command.add_argument('--seed', type=int, default=0)
+        command.add_argument('--workers', type=int, default=None, help='Ensemble worker processes (default: all cores)')
+
+    run_parser = commands.add_parser('run', help='Run the simulation and optionally save or plot it')
+    add_model_arguments(run_parser)
+    run_parser.add_argument('--replicas', type=int, default=1, help='Above 1, run a Monte Carlo ensemble')
+    run_parser.add_argument('--mean-field', action='store_true', help='Compute the expected trajectory instead')
+    run_parser.add_argument('--agents', action='store_true', help='Track every player (FLIP holdings, churn, inequality)')
+    run_parser.add_argument('--churn-rate', type=float, default=0.0, help='Daily chance a player leaves for good (--agents)')
+    run_parser.add_argument('--metrics-every', type=int, default=1, help='Days between Gini/top-1%% measurements (--agents)')
+    run_parser.add_argument('--tau-leap', action='store_true', help='Step through the day in adaptive hourly intervals')
+    run_parser.add_argument('--epsilon', type=float, default=0.03, help='Largest expected share of a pool drained per step (--tau-leap)')
+    run_parser.add_argument('--jit', action='store_true', help='Run single runs through the Numba kernel if installed')
+    run_parser.add_argument('--profile', action='store_true', help='Print the time spent in each phase of the run')
+    run_parser.add_argument('--cprofile', metavar='PATH', help='Write cProfile stats of a single run to PATH (read with pstats)')
+    run_parser.add_argument('--out', help='Write the series to a .npz or .parquet file')
+    run_parser.add_argument('--plot', action='store_true', help='Show the charts (imports Plotly)')
+    run_parser.set_defaults(func=run)
+
+    validate_parser = commands.add_parser('validate', help='Check the mean-field engine against a stochastic ensemble')
+    add_model_arguments(validate_parser)
+    validate_parser.add_argument('--replicas', type=int, default=200)
+    validate_parser.set_defaults(func=validate)
+
+    bench_parser = commands.add_parser('bench', help='Time the simulation and chart building at several scales')
+    bench_parser.add_argument('--repeat', type=int, default=3)
+    bench_parser.add_argument('--seed', type=int, default=0)
+    bench_parser.add_argument('--jit', action='store_true', help='Time the Numba kernel instead of the Python loop')
+    bench_parser.add_argument('--no-figures', action='store_true', help='Skip the Plotly cases')
+    bench_parser.add_argument('--out', help='Store the results as JSON (e.g. benchmarks/results.json)')
+    bench_parser.add_argument('--compare', help='Stored JSON results to compare against')
+    bench_parser.add_argument('--threshold', type=float, default=0.10, help='Relative change flagged by --compare')
+    bench_parser.set_defaults(func=bench)
+
+    startup_parser = commands.add_parser('startup', help='Measure cold-start import time')
+    startup_parser.add_argument('--repeat', type=int, default=5)
+    startup_parser.set_defaults(func=startup)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
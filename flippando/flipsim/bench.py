@@ -0,0 +1,133 @@
+"""Benchmarks for the simulation and the dashboard render path, stored as diffable JSON.
+
+Every case is timed with a fixed seed and no network access, so a stored result can be
+reproduced offline. Times are the median of `repeat` runs, rounded to three significant
+figures so that a `git diff` of two stored results is not swamped by noise in the last
+digits; compare() flags the cases that moved by more than a threshold. Peak memory is
+measured in a separate, untimed run because tracemalloc slows allocation down.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from .model import DEFAULT_PARAMS, SERIES_NAMES, logistic_growth, run_simulation
+
+# Scales the simulation is timed at
+K_VALUES = (10_000, 100_000, 1_000_000, 10_000_000)
+DAYS_VALUES = (365, 1095, 3650)
+
+# Relative slowdown above which compare() flags a case
+REGRESSION_THRESHOLD = 0.10
+
+
+def significant(x, digits=3):
+    return float(f'{x:.{digits}g}')
+
+
+def time_call(fn, repeat):
+    """Median wall time of fn() in seconds over `repeat` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def peak_memory(fn):
+    """Peak bytes allocated through Python (NumPy included) while fn() runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat):
+    return dict(seconds=significant(time_call(fn, repeat)), peak_bytes=int(significant(peak_memory(fn))))
+
+
+def environment():
+    """Interpreter, library versions and git commit the results were taken on."""
+    info = dict(python=platform.python_version(), numpy=np.__version__, machine=platform.machine())
+    try:
+        import plotly
+
+        info['plotly'] = plotly.__version__
+    except ImportError:
+        pass
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def run_benchmarks(repeat=3, seed=0, jit=False, figures=True, progress=None):
+    """Time every case and return {'environment': {...}, 'cases': {case name: measurements}}.
+
+    Cases are the simulation at every K x days scale, logistic_growth on its own, and, with
+    figures=True, build_figures, the JSON serialization of each of its charts, and
+    encode_results, the single typed-array payload the dashboard sends instead of figures
+    (payload_bytes compares the two). The figures only depend on the number of days, so
+    they are timed at the default K.
+    """
+    cases = {}
+
+    def record(name, fn):
+        cases[name] = measure(fn, repeat)
+        if progress is not None:
+            progress(name, cases[name])
+
+    for days in DAYS_VALUES:
+        record(f'logistic_growth days={days}', lambda: logistic_growth(np.arange(days), DEFAULT_PARAMS['P_0'], DEFAULT_PARAMS['K'], DEFAULT_PARAMS['r']))
+        for K in K_VALUES:
+            params = dict(DEFAULT_PARAMS, days=days, K=K)
+            record(f'run_simulation K=1e{round(np.log10(K))} days={days}', lambda: run_simulation(**params, rng=np.random.default_rng(seed), jit=jit))
+
+    if figures:
+        from .plots import build_figures, encode_results
+
+        for days in DAYS_VALUES:
+            results = dict(zip(SERIES_NAMES, run_simulation(**dict(DEFAULT_PARAMS, days=days), rng=np.random.default_rng(seed))))
+            record(f'build_figures days={days}', lambda: build_figures(results))
+            built = build_figures(results)
+            record(f'to_json days={days}', lambda: [fig.to_json() for fig in built.values()])
+            cases[f'to_json days={days}']['payload_bytes'] = sum(len(fig.to_json()) for fig in built.values())
+            record(f'encode_results days={days}', lambda: json.dumps(encode_results(results)))
+            cases[f'encode_results days={days}']['payload_bytes'] = len(json.dumps(encode_results(results)))
+
+    return dict(environment=environment(), repeat=repeat, seed=seed, jit=jit, cases=cases)
+
+
+def save(results, path):
+    """Write results as indented JSON with sorted keys, one value per line for clean diffs."""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Per-case (name, old seconds, new seconds, ratio, flag) for the cases in both results.
+
+    flag is 'slower' or 'faster' when the time moved by more than `threshold`, else ''.
+    """
+    rows = []
+    for name in sorted(set(old['cases']) & set(new['cases'])):
+        before, after = old['cases'][name]['seconds'], new['cases'][name]['seconds']
+        ratio = after / before if before else float('inf')
+        flag = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else ''
+        rows.append((name, before, after, ratio, flag))
+    return rows
@@ -0,0 +1,296 @@
+"""Content-addressed cache of simulation results with a memory tier and an optional disk tier."""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from numbers import Number
+
+import numpy as np
+
+from .profiling import phase
+
+# Bump whenever the model changes, so results computed by older code are never served
+CACHE_VERSION = 1
+
+
+def _normalize(value):
+    """Turn parameters into plain JSON values so 730, 730.0 and np.int64(730) share a key."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def cache_key(params, seed, **extra):
+    """Hash a run_simulation parameter set, its seed and any extra options into a cache key."""
+    payload = dict(version=CACHE_VERSION, params=_normalize(params), seed=_normalize(seed), **_normalize(extra))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _nbytes(result):
+    return sum(_nbytes(v) if isinstance(v, dict) else np.asarray(v).nbytes for v in result.values())
+
+
+def _pack(result, file):
+    """Write a result dict to a compressed .npz file; nested results are stored flat as 'series/stat'."""
+    flat = {}
+    for name, value in result.items():
+        if isinstance(value, dict):
+            flat.update({f'{name}/{inner}': v for inner, v in value.items()})
+        else:
+            flat[name] = value
+    np.savez_compressed(file, **flat)
+
+
+def _unpack(file):
+    result = {}
+    with np.load(file) as stored:
+        for name in stored.files:
+            outer, _, inner = name.partition('/')
+            if inner:
+                result.setdefault(outer, {})[inner] = stored[name]
+            else:
+                result[outer] = stored[name]
+    return result
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class DirectoryStore:
+    """Results as one .npz file each in a directory.
+
+    A file's modification time is when it was last used. Each save drops the files unused
+    for over max_age seconds, then the least recently used ones until the rest fit in
+    max_bytes (None for no bound).
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def load(self, key):
+        try:
+            result = _unpack(self._path(key))
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        return result
+
+    def save(self, key, result):
+        # Write to a temporary file first so a crash never leaves a truncated entry behind
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            _pack(result, f)
+        os.replace(tmp, self._path(key))
+        self.prune()
+
+    def prune(self):
+        """Delete the files past max_age, then the least recently used past max_bytes."""
+        if self.max_bytes is None and self.max_age is None:
+            return
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                # Names starting with a dot are saves still being written
+                if entry.name.endswith('.npz') and not entry.name.startswith('.'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort(reverse=True)
+        now, total = time.time(), 0
+        for used, size, path in files:
+            total += size
+            if (self.max_age is not None and now - used > self.max_age) or (self.max_bytes is not None and total > self.max_bytes):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def computing(self, key):
+        # Processes sharing the directory do not coordinate, each computes what it misses
+        return nullcontext()
+
+
+class SqliteStore:
+    """Results in one SQLite file that every process on the machine can share.
+
+    Each result is a row holding its .npz bytes. The database runs in WAL mode, so readers
+    never wait for a writer, and is memory-mapped up to mmap_bytes, so processes reading the
+    same results share the pages in the OS cache. computing(key) makes the processes compute
+    a result once between them: the first to ask claims the key, the others wait for it to
+    let go and then find the result stored. A claim is dropped when its process has died or
+    after claim_timeout seconds. Each save drops the rows unused for over max_age seconds,
+    then the least recently used ones until the rest fit in max_bytes (None for no bound);
+    SQLite reuses the freed pages rather than shrinking the file.
+    """
+
+    def __init__(self, path, mmap_bytes=1 << 30, claim_timeout=15 * 60, poll_interval=0.05, max_bytes=None, max_age=None):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db()
+
+    def _db(self):
+        # A connection must not cross a fork or a thread, so each thread of each process opens its own
+        if getattr(self._local, 'pid', None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.execute(f'PRAGMA mmap_size = {int(self.mmap_bytes)}')
+            db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, stored REAL NOT NULL, '
+                       'last_used REAL NOT NULL DEFAULT 0, size INTEGER NOT NULL DEFAULT 0)')
+            # Files from before pruning lack the usage columns; their rows were last used when stored
+            columns = {row[1] for row in db.execute('PRAGMA table_info(results)')}
+            if 'last_used' not in columns:
+                db.execute('ALTER TABLE results ADD COLUMN last_used REAL NOT NULL DEFAULT 0')
+                db.execute('ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+                db.execute('UPDATE results SET last_used = stored, size = length(value)')
+            db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+            db.execute('CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, pid INTEGER NOT NULL, since REAL NOT NULL)')
+            self._local.connection, self._local.pid = db, os.getpid()
+        return self._local.connection
+
+    def load(self, key):
+        db = self._db()
+        row = db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        db.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        return _unpack(io.BytesIO(row[0]))
+
+    def save(self, key, result):
+        buffer = io.BytesIO()
+        _pack(result, buffer)
+        value, now = buffer.getvalue(), time.time()
+        db = self._db()
+        db.execute('INSERT OR REPLACE INTO results (key, value, stored, last_used, size) VALUES (?, ?, ?, ?, ?)',
+                   (key, value, now, now, len(value)))
+        self.prune()
+
+    def prune(self):
+        """Delete the rows past max_age, then the least recently used past max_bytes."""
+        db = self._db()
+        if self.max_age is not None:
+            db.execute('DELETE FROM results WHERE last_used < ?', (time.time() - self.max_age,))
+        if self.max_bytes is not None:
+            db.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM (SELECT key, SUM(size) OVER '
+                '(ORDER BY last_used DESC, key ROWS UNBOUNDED PRECEDING) AS kept FROM results) WHERE kept > ?)',
+                (self.max_bytes,),
+            )
+
+    @contextmanager
+    def computing(self, key):
+        """Hold the claim on key for the duration, waiting while another process holds it."""
+        db = self._db()
+        while not db.execute('INSERT OR IGNORE INTO claims VALUES (?, ?, ?)', (key, os.getpid(), time.time())).rowcount:
+            row = db.execute('SELECT pid, since FROM claims WHERE key = ?', (key,)).fetchone()
+            if row is not None and (not _alive(row[0]) or time.time() - row[1] > self.claim_timeout):
+                db.execute('DELETE FROM claims WHERE key = ? AND pid = ? AND since = ?', (key, *row))
+            else:
+                time.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            db.execute('DELETE FROM claims WHERE key = ? AND pid = ?', (key, os.getpid()))
+
+
+class ResultCache:
+    """LRU cache of result dicts (arrays, or dicts of arrays) bounded by their size in bytes.
+
+    Behind the memory tier sits an optional store that outlives the process: a directory
+    of compressed .npz files, or a SqliteStore shared by several processes. Results are
+    written through to it and read back on a memory miss. Given a flipsim.profiling.Profile,
+    get, put and get_or_compute time their lookups and stores as its 'cache' phase.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, directory=None, store=None):
+        self.max_bytes = max_bytes
+        self.store = store if store is not None else DirectoryStore(directory) if directory else None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # for servers answering requests in several threads
+
+    def _remember(self, key, result):
+        with self._lock:
+            if key in self.entries:
+                self.size -= _nbytes(self.entries.pop(key))
+            size = _nbytes(result)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = result
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= _nbytes(evicted)
+
+    def get(self, key, profile=None):
+        with phase(profile, 'cache'):
+            return self._get(key)
+
+    def _get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        result = self.store.load(key) if self.store is not None else None
+        if result is not None:
+            self._remember(key, result)
+            self.hits += 1
+            return result
+        self.misses += 1
+        return None
+
+    def put(self, key, result, profile=None):
+        with phase(profile, 'cache'):
+            self._remember(key, result)
+            if self.store is not None:
+                self.store.save(key, result)
+
+    def computing(self, key):
+        """Context in which to compute key, so processes sharing the store compute it only once."""
+        return self.store.computing(key) if self.store is not None else nullcontext()
+
+    def get_or_compute(self, key, compute, profile=None):
+        result = self.get(key, profile)
+        if result is None:
+            with self.computing(key):
+                # Another process may have stored it while this one waited
+                result = self.get(key, profile)
+                if result is None:
+                    result = compute()
+                    self.put(key, result, profile)
+        return result
@@ -0,0 +1,48 @@
+"""Largest-Triangle-Three-Buckets downsampling of daily series, for drawing long horizons."""
+
+import numpy as np
+
+
+def lttb_indices(series, n_out):
+    """Indices of the points LTTB keeps from each row of `series`, first and last included.
+
+    series is one daily series (n,) or several stacked as (rows, n), all on the same day axis.
+    The days between the first and last are cut into n_out - 2 buckets, and each bucket
+    keeps the point forming the largest triangle with the point kept before it and the
+    mean of the next bucket, which preserves peaks, troughs and the overall shape. The
+    buckets are visited in turn, but every row is handled at once, so stacking series is
+    much faster than downsampling them one by one. With n_out >= n every index is kept.
+    """
+    y = np.atleast_2d(np.asarray(series, dtype=float))
+    rows, n = y.shape
+    if n_out >= n or n_out < 3:
+        indices = np.broadcast_to(np.arange(n), (rows, n))
+        return indices[0] if np.ndim(series) == 1 else indices
+
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # Mean point of every bucket, and the last point standing in for the bucket after the last
+    sums = np.concatenate([np.zeros((rows, 1)), np.cumsum(y, axis=1)], axis=1)
+    widths = np.diff(edges)
+    mean_x = np.append((edges[:-1] + edges[1:] - 1) / 2, n - 1)
+    mean_y = np.concatenate([(sums[:, edges[1:]] - sums[:, edges[:-1]]) / widths, y[:, -1:]], axis=1)
+
+    kept = np.empty((rows, n_out), dtype=np.int64)
+    kept[:, 0] = 0
+    kept[:, -1] = n - 1
+    every = np.arange(rows)
+    a = np.zeros(rows, dtype=np.int64)
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a][:, None], y[every, a][:, None]
+        area = np.abs((xa - mean_x[i + 1]) * (y[:, lo:hi] - ya) - (xa - x[lo:hi]) * (mean_y[:, i + 1:i + 2] - ya))
+        a = lo + np.argmax(area, axis=1)
+        kept[:, i + 1] = a
+    return kept[0] if np.ndim(series) == 1 else kept
+
+
+def downsample(series, n_out, start=0):
+    """(days, values) of the points lttb_indices keeps, with days counted from `start`."""
+    indices = lttb_indices(series, n_out)
+    values = np.take_along_axis(np.atleast_2d(np.asarray(series)), np.atleast_2d(indices), axis=1)
+    return indices + start, values[0] if np.ndim(series) == 1 else values
@@ -0,0 +1,121 @@
+"""Monte Carlo ensembles of run_simulation reduced to mean and percentile bands."""
+
+import math
+import os
+
+import numpy as np
+
+from .model import SERIES_NAMES, run_simulation
+
+# Percentiles reported for every series
+PERCENTILES = (5, 50, 95)
+
+
+class StreamingQuantile:
+    """P-square estimate of one quantile for every cell of an array, updated one sample at a time."""
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.first = []  # The first five samples seed the markers
+        self.desired = np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= 5:
+            self.first.append(np.array(x, dtype=float))
+            if self.count == 5:
+                self.heights = np.sort(np.stack(self.first), axis=0)
+                marker = np.arange(5.0).reshape((5,) + (1,) * (self.heights.ndim - 1))
+                self.positions = np.broadcast_to(marker, self.heights.shape).copy()
+                self.first = None
+            return
+
+        q, n = self.heights, self.positions
+        # Widen the outer markers and shift every marker above the sample one place up
+        q[0] = np.minimum(q[0], x)
+        q[4] = np.maximum(q[4], x)
+        n[1:4] += x < q[1:4]
+        n[4] = self.count - 1
+        self.desired += self.increments
+
+        # Nudge the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+            if not move.any():
+                continue
+            d = np.where(move, np.sign(d), 0.0)
+            parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+            )
+            neighbour = np.where(d > 0, i + 1, i - 1)
+            q_near = np.take_along_axis(q, neighbour[None], axis=0)[0]
+            n_near = np.take_along_axis(n, neighbour[None], axis=0)[0]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                linear = q[i] + d * (q_near - q[i]) / (n_near - n[i])
+            inside = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+            q[i] = np.where(move, np.where(inside, parabolic, linear), q[i])
+            n[i] += d
+
+    def value(self):
+        if self.count < 5:
+            return np.percentile(np.stack(self.first), self.p * 100, axis=0)
+        return self.heights[2].copy()
+
+
+def _run_replicas(params, seeds):
+    """Run one chunk of replicas in a worker, each on its own seeded stream."""
+    return [
+        np.stack(run_simulation(**params, rng=np.random.default_rng(seed)))
+        for seed in seeds
+    ]
+
+
+def run_ensemble(params, replicas, seed=None, max_workers=None, chunk_size=None, progress=None):
+    """Run independently seeded replicas of run_simulation and reduce them online.
+
+    Returns a dict mapping each name in SERIES_NAMES to a dict of 'mean', 'p5',
+    'p50' and 'p95' arrays. Replica i always draws from the i-th child of
+    SeedSequence(seed), so results only depend on seed, not on the worker count.
+    progress, if given, is called as progress(replicas_done, replicas) as they come in.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replicas)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(replicas / (max_workers * 4)))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, replicas, chunk_size)]
+
+    total = None
+    done = 0
+    quantiles = [StreamingQuantile(p / 100) for p in PERCENTILES]
+
+    def reduce(results):
+        nonlocal total, done
+        for trajectory in results:
+            total = trajectory.copy() if total is None else total + trajectory
+            for quantile in quantiles:
+                quantile.update(trajectory)
+        done += len(results)
+        if progress is not None:
+            progress(done, replicas)
+
+    # Chunks come back in submission order, so the reduction is the same for any pool size
+    if max_workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            reduce(_run_replicas(params, chunk))
+    else:
+        # Imported here since it pulls in multiprocessing, which dominates cold start
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for results in executor.map(_run_replicas, [params] * len(chunks), chunks):
+                reduce(results)
+
+    mean = total / replicas
+    bands = [quantile.value() for quantile in quantiles]
+    return {
+        name: dict(mean=mean[k], **{f'p{p}': band[k] for p, band in zip(PERCENTILES, bands)})
+        for k, name in enumerate(SERIES_NAMES)
+    }
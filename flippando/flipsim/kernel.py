@@ -0,0 +1,109 @@
+"""Optional Numba-compiled day loop, used by advance(..., jit=True) when Numba is installed.
+
+The kernel keeps the pools and balances as float64 scalars instead of the basic_nfts dict,
+settles complex NFT creators one by one (a plain loop is fast once compiled) and draws from
+the same numpy Generator in the same order as the Python engine, so under a fixed seed the
+two produce identical series.
+"""
+
+import numpy as np
+
+from .model import SimulationState, logistic_growth
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+HAVE_NUMBA = njit is not None
+
+# Slots of the state vector passed to the kernel
+FLIP_SUPPLY, LOCKED_FLIP, BASIC_4X4, BASIC_8X8, COMPLEX, TOTAL_CREATED, CUMULATIVE_4X4, CUMULATIVE_8X8 = range(8)
+
+
+def _day_loop(rng, start, players, daily_active_percentage, complex_nft_creation_percentage, state, out):
+    """Simulate len(players) days from `state` (updated in place), writing series rows into `out`."""
+    for i in range(len(players)):
+        day = start + i
+
+        out[6, i] = state[CUMULATIVE_4X4] = state[CUMULATIVE_4X4] + state[BASIC_4X4]
+        out[7, i] = state[CUMULATIVE_8X8] = state[CUMULATIVE_8X8] + state[BASIC_8X8]
+
+        # Daily puzzle solving and FLIP minting (locked): 4x4 mints 1, 8x8 mints 4
+        active_players = int(players[i] * daily_active_percentage)
+        if active_players > 0:
+            solved_8x8 = rng.binomial(active_players, 0.5)
+            minted_4x4 = active_players - solved_8x8
+            minted_8x8 = solved_8x8 * 4
+            state[BASIC_4X4] = max(state[BASIC_4X4] - minted_4x4, 0.0)
+            state[BASIC_8X8] = max(state[BASIC_8X8] - minted_8x8, 0.0)
+            state[LOCKED_FLIP] += minted_4x4 + minted_8x8
+            state[TOTAL_CREATED] += minted_4x4 + minted_8x8
+
+        # Create new basic NFTs realistically over time
+        state[BASIC_4X4] += 1 + day * 0.05
+        state[BASIC_8X8] += 0.5 + day * 0.025
+
+        # Complex NFT creators, in order: 8x8 when unlocked and it fits, else 4x4 if it fits
+        complex_nft_creators = int(players[i] * complex_nft_creation_percentage)
+        canvas_8x8 = state[TOTAL_CREATED] >= 1000
+        flip_unlocked = 0
+        created = 0
+        for _ in range(complex_nft_creators):
+            nfts_used = min(max(int(rng.normal(32.0, 10.0)), 1), 62)
+            if canvas_8x8 and state[BASIC_8X8] >= nfts_used:
+                state[BASIC_8X8] -= nfts_used
+                flip_unlocked += 4 * nfts_used
+                created += 1
+            elif state[BASIC_4X4] >= nfts_used:
+                state[BASIC_4X4] -= nfts_used
+                flip_unlocked += nfts_used
+                created += 1
+        state[FLIP_SUPPLY] = max(state[FLIP_SUPPLY] + flip_unlocked, 0.0)
+        state[LOCKED_FLIP] = max(state[LOCKED_FLIP] - flip_unlocked, 0.0)
+        state[COMPLEX] = max(state[COMPLEX] + created, 0.0)
+
+        out[0, i] = state[FLIP_SUPPLY]
+        out[1, i] = state[LOCKED_FLIP]
+        out[2, i] = state[BASIC_4X4]
+        out[3, i] = state[BASIC_8X8]
+        out[4, i] = state[COMPLEX]
+        out[5, i] = players[i]
+
+
+# Compiled code is cached in __pycache__, so only the first run ever pays for compilation
+_compiled_day_loop = njit(cache=True)(_day_loop) if HAVE_NUMBA else None
+
+
+def advance_jit(state, days, P_0, K, r, daily_active_percentage, complex_nft_creation_percentage, rng, progress=None, checkpoint_every=None, checkpoint=None):
+    """Compiled counterpart of advance() for a numpy Generator; same arguments and results."""
+    # Players come from NumPy's exp, which can differ from Numba's in the last bit
+    players = logistic_growth(np.arange(state.day, state.day + days), P_0, K, r)
+    values = np.array([
+        state.flip_supply, state.locked_flip, state.basic_nfts_4x4, state.basic_nfts_8x8,
+        state.complex_nfts, state.total_basic_nfts_created,
+        state.cumulative_basic_nfts_4x4, state.cumulative_basic_nfts_8x8,
+    ], dtype=float)
+    out = np.zeros((8, days))
+
+    # Callbacks cannot run inside the kernel, so it runs in segments between them
+    if checkpoint is not None:
+        segment = checkpoint_every
+    elif progress is not None:
+        segment = max(days // 100, 1)
+    else:
+        segment = max(days, 1)
+
+    def snapshot(day):
+        return SimulationState(day, *values.tolist(), rng_state=rng.bit_generator.state)
+
+    for done in range(0, days, segment):
+        stop = min(done + segment, days)
+        _compiled_day_loop(rng, state.day + done, players[done:stop], daily_active_percentage,
+                           complex_nft_creation_percentage, values, out[:, done:stop])
+        if progress is not None:
+            progress(stop, days)
+        if checkpoint is not None and stop % checkpoint_every == 0:
+            checkpoint(snapshot(state.day + stop))
+
+    return tuple(out), snapshot(state.day + days)
@@ -0,0 +1,239 @@
+"""Mean-field (expected-value) version of run_simulation, computed with whole-array operations."""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .model import SERIES_NAMES, create_basic_nfts, logistic_growth, mint_flip_tokens
+
+
+def demand_distribution(mean, std_dev):
+    """Probabilities of nfts_used_for_complex returning 0, 1, ..., mean + 3*std_dev."""
+    high = mean + 3 * std_dev
+
+    def cdf(x):
+        return 0.5 * (1 + math.erf((x - mean) / (std_dev * math.sqrt(2))))
+
+    # Truncation maps [k, k+1) to k for k >= 1, and clipping sends everything below 2 to 1
+    probs = np.zeros(high + 1)
+    probs[1] = cdf(2)
+    for k in range(2, high):
+        probs[k] = cdf(k + 1) - cdf(k)
+    probs[high] = 1 - cdf(high)
+    return probs
+
+
+def reflected(start, steps, floors=0):
+    """Vectorised p[t] = max(p[t-1] + steps[t], floors[t]) with p[-1] = start.
+
+    Unrolling the recurrence gives p[t] = A[t] + max(start, max_{k<=t} (floors[k] - A[k]))
+    with A the cumulative sum of the steps, so it needs no loop over days. Several series
+    stacked along the first axis run at once, each from its own start.
+    """
+    climb = np.cumsum(steps, axis=-1)
+    floors = np.broadcast_to(floors, climb.shape)
+    return climb + np.maximum(np.expand_dims(start, -1), np.maximum.accumulate(floors - climb, axis=-1))
+
+
+@lru_cache(maxsize=4)
+def settlement_table(mean, std_dev, octaves=24, per_octave=8):
+    """Expected outcome of settling n complex NFT demands in order against a small pool.
+
+    A demand d drawn from demand_distribution is met, and the pool drops by d, when d fits
+    what is left; otherwise the pool stays. For every whole pool 0 .. 2 * (mean + 3*std_dev)
+    + 1 and n on a grid (every count to 64, then `per_octave` counts per doubling up to
+    2**octaves), returns (grid, expected pool left, expected demands met), the tables
+    shaped (len(grid), pools). Above half that range every demand fits, and settle drains
+    the pool as a fluid down into it. Built once per process, in a few milliseconds.
+    """
+    probs = demand_distribution(mean, std_dev)
+    size = 2 * len(probs)
+    levels = np.arange(size)
+    fit = np.cumsum(probs)[np.minimum(levels, len(probs) - 1)]
+    T = np.diag(1 - fit)
+    for d in range(1, len(probs)):
+        T[levels[d:], levels[d:] - d] += probs[d]
+
+    # Every creator faces the same chain, so step more creators onto the front of n:
+    # left[n + step] = T^step @ left[n] and met[n + step] = met over step + T^step @ met[n]
+    grid, left, met = [0], [levels.astype(float)], [np.zeros(size)]
+    power, gain, step = T, fit, 1
+    while grid[-1] < 2 ** octaves:
+        if grid[-1] >= 64 and grid[-1] >= per_octave * 2 * step:
+            gain = gain + power @ gain
+            power = power @ power
+            step *= 2
+        grid.append(grid[-1] + step)
+        met.append(gain + power @ met[-1])
+        left.append(power @ left[-1])
+    return np.array(grid, dtype=float), np.array(left), np.array(met)
+
+
+def affine_scan(offsets, slopes, start):
+    """Vectorised x[t] = offsets[t] + slopes[t] * x[t-1] with x[-1] = start, by the same prefix scan."""
+    offsets, slopes = np.array(offsets, dtype=float), np.array(slopes, dtype=float)
+    span = 1
+    while span < len(offsets):
+        offsets[span:] = offsets[span:] + slopes[span:] * offsets[:-span]
+        slopes[span:] = slopes[span:] * slopes[:-span]
+        span *= 2
+    return offsets + slopes * start
+
+
+def clipped_scan(offsets, slopes, floors, start):
+    """Vectorised x[t] = max(offsets[t] + slopes[t] * x[t-1], floors[t]) with x[-1] = start and slopes >= 0.
+
+    Two such daily maps compose into one of the same form, so composing them pairwise over
+    doubling spans (a prefix scan) solves the recurrence in about log2(days) whole-array
+    steps, with no division for zero slopes to trip on.
+    """
+    offsets, slopes, floors = (np.array(x, dtype=float) for x in (offsets, slopes, floors))
+    span = 1
+    while span < len(offsets):
+        floors[span:] = np.maximum(offsets[span:] + slopes[span:] * floors[:-span], floors[span:])
+        offsets[span:] = offsets[span:] + slopes[span:] * offsets[:-span]
+        slopes[span:] = slopes[span:] * slopes[:-span]
+        span *= 2
+    return np.maximum(offsets + slopes * start, floors)
+
+
+def settle(pool, creators, fraction=0, mean=32, std_dev=10):
+    """Expected (pool left, complex NFTs made, d pool left / d pool) when `creators` settle demands against `pool`.
+
+    `fraction` is the part of the pool below a whole NFT, which no demand can take. While
+    the pool holds more than any demand every creator is met and takes the mean; the rest
+    is read off settlement_table, interpolated between whole pools (an expected pool is a
+    mix of them) and between grid counts, so fractional creator counts need no special case.
+    """
+    grid, left, met = settlement_table(mean, std_dev)
+    size = left.shape[1]
+    top = size // 2
+    pool = pool - fraction
+    fluid = np.clip(np.floor((pool - top) / mean), 0, np.floor(creators))
+    rest = pool - fluid * mean
+    n = creators - fluid
+
+    s = np.clip(rest, 0, size - 1)
+    i = np.minimum(s.astype(int), size - 2)
+    ws = s - i
+    j = np.clip(np.searchsorted(grid, n, side='right') - 1, 0, len(grid) - 2)
+    wn = np.clip((n - grid[j]) / (grid[j + 1] - grid[j]), 0, 1)
+
+    def at(table):
+        low = table[j, i] + ws * (table[j, i + 1] - table[j, i])
+        high = table[j + 1, i] + ws * (table[j + 1, i + 1] - table[j + 1, i])
+        return low + wn * (high - low)
+
+    # A pool still above the table after the fluid phase has under one creator left, who fits
+    beyond = rest > size - 1
+    pool_left = np.where(beyond, rest - n * mean, at(left)) + fraction
+    made = fluid + np.where(beyond, n, at(met))
+    step = left[j, i + 1] - left[j, i] + wn * (left[j + 1, i + 1] - left[j + 1, i] - left[j, i + 1] + left[j, i])
+    return pool_left, made, np.where(beyond, 1, step)
+
+
+def run_mean_field(days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip, basic_nfts, complex_nfts, complex_nft_creation_percentage, passes=200):
+    """Approximate expected-value trajectory of run_simulation, returned as the same tuple of daily series.
+
+    Puzzle choices are replaced by their means and the pools by fluids, except while complex
+    NFT demands are settled, which settle reads off a table of the settlement's expectation.
+    The creators the 8x8 pool turns away take from the 4x4 pool. Each day starts from the
+    pools the day before left, so the pools at the end of every day are solved for together,
+    by Newton steps over whole arrays (at most `passes` of them, usually two or three).
+    """
+    day_index = np.arange(days)
+    players = logistic_growth(day_index, P_0, K, r)
+    active_players = np.floor(players * daily_active_percentage)
+    complex_nft_creators = np.floor(players * complex_nft_creation_percentage)
+
+    # Expected minting: half of the active players solve each puzzle size
+    minted_4x4 = active_players / 2 * mint_flip_tokens('4x4')
+    minted_8x8 = active_players / 2 * mint_flip_tokens('8x8')
+    flip_minted = minted_4x4 + minted_8x8
+    canvas_8x8 = sum(basic_nfts.values()) + np.cumsum(flip_minted) >= 1000
+    creators_8x8 = np.where(canvas_8x8, complex_nft_creators, 0)
+
+    growth_4x4 = create_basic_nfts(day_index, 1, 0.05)
+    growth_8x8 = create_basic_nfts(day_index, 0.5, 0.025)
+
+    def day(start, end, minted, growth, creators):
+        before = np.concatenate([[start], end[:-1]])
+        available = np.maximum(before - minted, 0) + growth
+        # Puzzles and complex NFTs only take whole NFTs, so a pool's fraction is that of the
+        # new basic NFTs since minting last emptied it, or since the start
+        emptied = np.maximum.accumulate(np.where(before <= minted, day_index, -1))
+        added = np.cumsum(growth)
+        since = np.where(emptied >= 0, added - np.concatenate([[0], added])[np.maximum(emptied, 0)], start + added)
+        return (before, available, *settle(available, creators, since % 1))
+
+    def newton(start, end, available, left, slope, minted, growth, first):
+        before = np.concatenate([[start], end[:-1]])
+        if first:
+            # From pools far off, keep the clamp at minting exact and take the pool left as
+            # rising with the pool available: left = base + slope * (max(before - minted, 0)
+            # + growth), a recurrence clipped_scan solves whole
+            slope = np.clip(slope, 0, 1)
+            base = left - slope * available + slope * growth
+            return clipped_scan(base - slope * minted, slope, base, start)
+        # Close to the answer, linearise the clamp as well. A whole NFT more can let another
+        # demand fit and leave less, so slopes may be negative, which affine_scan allows
+        slope = slope * (before > minted)
+        return np.maximum(affine_scan(left - slope * before, slope, start), 0)
+
+    def residual(end_8x8, end_4x4):
+        settled_8x8 = day(basic_nfts['8x8'], end_8x8, minted_8x8, growth_8x8, creators_8x8)
+        settled_4x4 = day(basic_nfts['4x4'], end_4x4, minted_4x4, growth_4x4, complex_nft_creators - settled_8x8[3])
+        error = max(np.abs(settled_8x8[2] - end_8x8).max(initial=0), np.abs(settled_4x4[2] - end_4x4).max(initial=0))
+        return error, settled_8x8, settled_4x4
+
+    # Pools at the end of every day, from none left over at all. Each pass is a Newton step:
+    # every day's settlement is taken as linear in the pool the day before left, and that
+    # chain over the days is solved at once by a scan
+    end_8x8 = end_4x4 = np.zeros(days)
+    error, settled_8x8, settled_4x4 = residual(end_8x8, end_4x4)
+    for k in range(passes):
+        if error < 1e-9:
+            break
+        step_8x8 = newton(basic_nfts['8x8'], end_8x8, *settled_8x8[1:3], settled_8x8[4], minted_8x8, growth_8x8, k == 0) - end_8x8
+        step_4x4 = newton(basic_nfts['4x4'], end_4x4, *settled_4x4[1:3], settled_4x4[4], minted_4x4, growth_4x4, k == 0) - end_4x4
+        # The settlement has kinks Newton can circle round, so halve a step that does not help
+        for t in (1, 0.5, 0.25, 0.125):
+            trial = residual(end_8x8 + t * step_8x8, end_4x4 + t * step_4x4)
+            if trial[0] < error or k == 0:
+                break
+        end_8x8, end_4x4 = end_8x8 + t * step_8x8, end_4x4 + t * step_4x4
+        error, settled_8x8, settled_4x4 = trial
+    before_8x8, available_8x8, end_8x8, created_8x8, _ = settled_8x8
+    before_4x4, available_4x4, end_4x4, created_4x4, _ = settled_4x4
+    used_8x8 = available_8x8 - end_8x8
+    used_4x4 = available_4x4 - end_4x4
+
+    flip_unlocked = used_8x8 * mint_flip_tokens('8x8') + used_4x4 * mint_flip_tokens('4x4')
+    daily_flip_supply = reflected(flip_supply, flip_unlocked)
+    daily_locked_flip = reflected(locked_flip, flip_minted - flip_unlocked)
+    daily_complex_nfts = reflected(complex_nfts, created_8x8 + created_4x4)
+    cumulative_basic_nfts_4x4 = np.cumsum(before_4x4)
+    cumulative_basic_nfts_8x8 = np.cumsum(before_8x8)
+
+    return daily_flip_supply, daily_locked_flip, end_4x4, end_8x8, daily_complex_nfts, players, cumulative_basic_nfts_4x4, cumulative_basic_nfts_8x8
+
+
+def validate_mean_field(params, replicas=200, seed=0, max_workers=None):
+    """Compare run_mean_field with the mean of a stochastic ensemble for the same parameters.
+
+    Returns {series name: {'max_error', 'final_error'}}, both relative to the largest value
+    the ensemble mean reaches, so series that start at zero do not blow up the ratio.
+    """
+    from .ensemble import run_ensemble
+
+    ensemble = run_ensemble(params, replicas, seed=seed, max_workers=max_workers)
+    report = {}
+    for name, expected in zip(SERIES_NAMES, run_mean_field(**params)):
+        mean = ensemble[name]['mean']
+        scale = max(np.abs(mean).max(), 1e-12)
+        report[name] = dict(
+            max_error=float(np.abs(expected - mean).max() / scale),
+            final_error=float(abs(expected[-1] - mean[-1]) / scale),
+        )
+    return report
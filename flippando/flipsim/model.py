@@ -0,0 +1,350 @@
+"""FLIP tokenomics model: player growth, puzzle minting and complex NFT creation."""
+
+import json
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+# Names of the daily series returned by run_simulation, in order
+SERIES_NAMES = (
+    'flip_supply',
+    'locked_flip',
+    'basic_nfts_4x4',
+    'basic_nfts_8x8',
+    'complex_nfts',
+    'players',
+    'cumulative_basic_nfts_4x4',
+    'cumulative_basic_nfts_8x8',
+)
+
+# run_simulation arguments of the V5 scenario, used by the CLI
+DEFAULT_PARAMS = dict(
+    days=365 * 2,
+    P_0=100,
+    K=1000000,
+    r=0.01,
+    daily_active_percentage=0.1,
+    flip_supply=10000,
+    locked_flip=5000,
+    basic_nfts={'4x4': 100, '8x8': 50},
+    complex_nfts=0,
+    complex_nft_creation_percentage=0.005,
+)
+
+# Helper Functions
+def logistic_growth(t, P_0, K, r):
+    """Logistic growth model for player population."""
+    return K / (1 + ((K - P_0) / P_0) * np.exp(-r * t))
+
+def mint_flip_tokens(puzzle_type):
+    """Mint FLIP tokens based on puzzle type solved."""
+    return 1 if puzzle_type == '4x4' else 4
+
+def mint_daily_puzzles(active_players, basic_nfts, rng=np.random):
+    """Solve a whole day's puzzles in one step and return the FLIP minted (locked)."""
+    if active_players <= 0:
+        return 0
+    # Each active player picks 4x4 or 8x8 with equal odds, so draw the day's mix at once
+    solved_8x8 = rng.binomial(active_players, 0.5)
+    solved_4x4 = active_players - solved_8x8
+    minted_4x4 = solved_4x4 * mint_flip_tokens('4x4')
+    minted_8x8 = solved_8x8 * mint_flip_tokens('8x8')
+    # Puzzles only ever deplete the pools, so one clamp matches clamping after every player
+    basic_nfts['4x4'] = max(basic_nfts['4x4'] - minted_4x4, 0)
+    basic_nfts['8x8'] = max(basic_nfts['8x8'] - minted_8x8, 0)
+    return int(minted_4x4 + minted_8x8)
+
+def determine_max_canvas_size(total_basic_nfts):
+    """Determine max canvas size based on total basic NFTs created."""
+    return '8x8' if total_basic_nfts >= 1000 else '4x4'
+
+def nfts_used_for_complex(mean, std_dev, size=None, rng=np.random):
+    """Determine number of basic NFTs used for complex NFTs based on normal distribution."""
+    nfts_used = np.trunc(rng.normal(mean, std_dev, size)).astype(int)
+    # Ensure the number of NFTs used is at least 1 and not more than the mean + 3*std_dev
+    return np.clip(nfts_used, 1, mean + 3 * std_dev)
+
+def fill_in_order(demands, pool):
+    """Mask of the demands met when taken in order from a pool, skipping any that no longer fit."""
+    accepted = np.zeros(len(demands), dtype=bool)
+    start = 0
+    while start < len(demands):
+        # Every demand up to the first one that overflows the pool is met
+        spent = np.cumsum(demands[start:])
+        run = np.searchsorted(spent, pool, side='right')
+        accepted[start:start + run] = True
+        if run:
+            pool -= spent[run - 1]
+        start += run
+        # Jump to the next demand small enough for what is left of the pool
+        fits = np.flatnonzero(demands[start:] <= pool)
+        if len(fits) == 0:
+            break
+        start += fits[0]
+    return accepted
+
+def settle_complex_nfts(nfts_used, basic_nfts, max_canvas_size):
+    """Settle a day's complex NFT demands in creator order and return which pool met each one.
+
+    Returns (from_8x8, from_4x4) masks over the creators; the NFTs used leave basic_nfts.
+    """
+    # The 8x8 pool only changes when it is used, so its takers are found on their own
+    # and every demand it turns away falls back to the 4x4 pool in the same order
+    from_8x8 = np.zeros(len(nfts_used), dtype=bool)
+    if max_canvas_size == '8x8':
+        from_8x8 = fill_in_order(nfts_used, basic_nfts['8x8'])
+    from_4x4 = np.zeros(len(nfts_used), dtype=bool)
+    from_4x4[~from_8x8] = fill_in_order(nfts_used[~from_8x8], basic_nfts['4x4'])
+
+    basic_nfts['8x8'] -= int(nfts_used[from_8x8].sum())
+    basic_nfts['4x4'] -= int(nfts_used[from_4x4].sum())
+    return from_8x8, from_4x4
+
+def create_complex_nfts(nfts_used, basic_nfts, max_canvas_size):
+    """Settle a day's complex NFT demands in creator order and return (FLIP unlocked, complex NFTs created)."""
+    from_8x8, from_4x4 = settle_complex_nfts(nfts_used, basic_nfts, max_canvas_size)
+    used_8x8 = int(nfts_used[from_8x8].sum())
+    used_4x4 = int(nfts_used[from_4x4].sum())
+    flip_unlocked = mint_flip_tokens('8x8') * used_8x8 + mint_flip_tokens('4x4') * used_4x4
+    return flip_unlocked, int(from_8x8.sum() + from_4x4.sum())
+
+def create_basic_nfts(day, initial_supply, growth_rate):
+    """Realistically create basic NFTs over time."""
+    # Assuming a linear increase over time, could be modified for other growth patterns
+    return initial_supply + day * growth_rate
+
+@dataclass
+class SimulationState:
+    """Everything the day loop carries from one day to the next, as a resumable snapshot."""
+
+    day: int
+    flip_supply: float
+    locked_flip: float
+    basic_nfts_4x4: float
+    basic_nfts_8x8: float
+    complex_nfts: float
+    total_basic_nfts_created: float
+    cumulative_basic_nfts_4x4: float = 0
+    cumulative_basic_nfts_8x8: float = 0
+    rng_state: dict = None  # bit_generator.state of the Generator driving the run, if any
+
+    @classmethod
+    def start(cls, flip_supply, locked_flip, basic_nfts, complex_nfts):
+        """State before day 0 for the given starting supplies."""
+        return cls(
+            day=0,
+            flip_supply=flip_supply,
+            locked_flip=locked_flip,
+            basic_nfts_4x4=basic_nfts['4x4'],
+            basic_nfts_8x8=basic_nfts['8x8'],
+            complex_nfts=complex_nfts,
+            total_basic_nfts_created=sum(basic_nfts.values()),  # Total number of basic NFTs ever created
+        )
+
+    def make_rng(self):
+        """Rebuild the Generator exactly where this snapshot left it."""
+        if self.rng_state is None:
+            raise ValueError('Snapshot was taken without a seeded Generator and cannot be resumed exactly')
+        bit_generator = getattr(np.random, self.rng_state['bit_generator'])()
+        bit_generator.state = self.rng_state
+        return np.random.Generator(bit_generator)
+
+    def to_dict(self):
+        """Flat dict of numpy scalars, as stored in .npz files and the result cache."""
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        values['rng_state'] = json.dumps(self.rng_state)
+        return {name: np.asarray(value) for name, value in values.items()}
+
+    @classmethod
+    def from_dict(cls, values):
+        values = {name: np.asarray(value).item() for name, value in values.items()}
+        values['rng_state'] = json.loads(values['rng_state'])
+        return cls(**values)
+
+    def save(self, path):
+        np.savez(path, **self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            return cls.from_dict({name: stored[name] for name in stored.files})
+
+def advance(state, days, P_0, K, r, daily_active_percentage, complex_nft_creation_percentage, rng=None, progress=None, checkpoint_every=None, checkpoint=None, jit=False, profile=None):
+    """Simulate `days` more days from a snapshot and return (daily series, final snapshot).
+
+    The series are in SERIES_NAMES order and cover only the new days. progress, if given,
+    is called as progress(days_done, days) after every simulated day, and checkpoint, if
+    given, receives a snapshot every `checkpoint_every` days. With jit=True and a Generator,
+    the Numba kernel in flipsim.kernel runs the loop if Numba is installed.
+
+    profile, a flipsim.profiling.Profile, receives the time spent in each phase of the day
+    (DAY_PHASES, prefixed 'day/'). Without one the loop takes no timings at all.
+    """
+    if jit and isinstance(rng, np.random.Generator):
+        from . import kernel
+
+        if kernel.HAVE_NUMBA:
+            start = time.perf_counter()
+            result = kernel.advance_jit(state, days, P_0, K, r, daily_active_percentage, complex_nft_creation_percentage, rng, progress, checkpoint_every, checkpoint)
+            if profile is not None:
+                profile.add('day/jit_kernel', time.perf_counter() - start, days)
+            return result
+
+    # Without a Generator the legacy global np.random stream is used
+    rng = np.random if rng is None else rng
+    start = state.day
+    flip_supply = state.flip_supply
+    locked_flip = state.locked_flip
+    basic_nfts = {'4x4': state.basic_nfts_4x4, '8x8': state.basic_nfts_8x8}
+    complex_nfts = state.complex_nfts
+    total_basic_nfts_created = state.total_basic_nfts_created
+    cumulative_4x4 = state.cumulative_basic_nfts_4x4
+    cumulative_8x8 = state.cumulative_basic_nfts_8x8
+
+    def snapshot(day):
+        return SimulationState(
+            day=day,
+            flip_supply=flip_supply,
+            locked_flip=locked_flip,
+            basic_nfts_4x4=basic_nfts['4x4'],
+            basic_nfts_8x8=basic_nfts['8x8'],
+            complex_nfts=complex_nfts,
+            total_basic_nfts_created=total_basic_nfts_created,
+            cumulative_basic_nfts_4x4=cumulative_4x4,
+            cumulative_basic_nfts_8x8=cumulative_8x8,
+            rng_state=rng.bit_generator.state if isinstance(rng, np.random.Generator) else None,
+        )
+
+    # Tracking Arrays
+    daily_flip_supply = np.zeros(days)
+    daily_locked_flip = np.zeros(days)  # Tracking locked FLIP
+    daily_basic_nfts_4x4 = np.zeros(days)
+    daily_basic_nfts_8x8 = np.zeros(days)
+    daily_complex_nfts = np.zeros(days)
+    daily_players = np.zeros(days)
+
+    # New tracking arrays for cumulative basic NFTs
+    cumulative_basic_nfts_4x4 = np.zeros(days)
+    cumulative_basic_nfts_8x8 = np.zeros(days)
+
+    # Phase boundaries are stamped only when profiling, and summed up after the loop
+    stamps = [] if profile is not None else None
+    clock = time.perf_counter
+
+    # Simulation Loop
+    for i in range(days):
+        day = start + i
+        if stamps is not None:
+            stamps.append(clock())
+
+        # Update players using logistic growth model
+        players = logistic_growth(day, P_0, K, r)
+        daily_players[i] = players
+
+        # Update cumulative basic NFTs
+        cumulative_4x4 += basic_nfts['4x4']
+        cumulative_8x8 += basic_nfts['8x8']
+        cumulative_basic_nfts_4x4[i] = cumulative_4x4
+        cumulative_basic_nfts_8x8[i] = cumulative_8x8
+        if stamps is not None:
+            stamps.append(clock())
+
+        # Determine the number of active players based on some percentage
+        active_players = int(players * daily_active_percentage)
+
+        # Daily puzzle solving and FLIP minting (locked)
+        flip_minted = mint_daily_puzzles(active_players, basic_nfts, rng)
+        locked_flip += flip_minted
+        total_basic_nfts_created += flip_minted
+        if stamps is not None:
+            stamps.append(clock())
+
+        # Create new basic NFTs realistically over time
+        basic_nfts['4x4'] += create_basic_nfts(day, 1, 0.05)  # Example growth rate
+        basic_nfts['8x8'] += create_basic_nfts(day, 0.5, 0.025)  # Example growth rate
+        if stamps is not None:
+            stamps.append(clock())
+
+        # Complex NFT Creation Logic
+        complex_nft_creators = int(players * complex_nft_creation_percentage)
+        max_canvas_size = determine_max_canvas_size(total_basic_nfts_created)
+
+        # Draw every creator's demand at once, then settle them against the pools in order
+        nfts_used = nfts_used_for_complex(32, 10, max(complex_nft_creators, 0), rng)
+        flip_unlocked, complex_created = create_complex_nfts(nfts_used, basic_nfts, max_canvas_size)
+        flip_supply += flip_unlocked
+        locked_flip -= flip_unlocked
+        complex_nfts += complex_created  # Increment complex NFT count
+        if stamps is not None:
+            stamps.append(clock())
+
+        # Prevent negative numbers
+        flip_supply = max(flip_supply, 0)
+        locked_flip = max(locked_flip, 0)
+        complex_nfts = max(complex_nfts, 0)
+
+        # Update daily metrics
+        daily_flip_supply[i] = flip_supply
+        daily_locked_flip[i] = locked_flip
+        daily_basic_nfts_4x4[i] = basic_nfts['4x4']
+        daily_basic_nfts_8x8[i] = basic_nfts['8x8']
+        daily_complex_nfts[i] = complex_nfts
+
+        if progress is not None:
+            progress(i + 1, days)
+        if checkpoint is not None and (i + 1) % checkpoint_every == 0:
+            checkpoint(snapshot(day + 1))
+        if stamps is not None:
+            stamps.append(clock())
+
+    if profile is not None:
+        profile.add_day_loop(stamps)
+
+    series = (daily_flip_supply, daily_locked_flip, daily_basic_nfts_4x4, daily_basic_nfts_8x8, daily_complex_nfts, daily_players, cumulative_basic_nfts_4x4, cumulative_basic_nfts_8x8)
+    return series, snapshot(start + days)
+
+def locked_flip_exhausted(record):
+    """Stop predicate for stream_simulation: all locked FLIP has been unlocked."""
+    return record['locked_flip'] <= 0
+
+def stop_index(results, stop):
+    """Number of days up to and including the first one whose record satisfies stop, or None.
+
+    results is {series name: daily array}; each day is passed to stop as {name: value}.
+    """
+    for i in range(len(results['players'])):
+        if stop({name: results[name][i] for name in SERIES_NAMES}):
+            return i + 1
+    return None
+
+def stream_simulation(state, days, P_0, K, r, daily_active_percentage, complex_nft_creation_percentage, rng=None, chunk_days=1, stop=None, jit=False, profile=None):
+    """Simulate up to `days` more days from a snapshot, yielding (series, snapshot) every `chunk_days`.
+
+    Each item covers only the chunk's days, in SERIES_NAMES order, with the state after
+    them, so the consumer can draw the run as it goes and resume it later with advance().
+    stop, if given, sees every day's record as in stop_index, and the stream ends after
+    the chunk in which it first returns True. The chunks join up to exactly what one
+    advance() call over the same days returns.
+    """
+    done = 0
+    while done < days:
+        series, state = advance(
+            state, min(chunk_days, days - done), P_0, K, r, daily_active_percentage,
+            complex_nft_creation_percentage, rng=rng, jit=jit, profile=profile,
+        )
+        done += len(series[0])
+        yield series, state
+        if stop is not None and stop_index(dict(zip(SERIES_NAMES, series)), stop) is not None:
+            return
+
+def run_simulation(days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip, basic_nfts, complex_nfts, complex_nft_creation_percentage, rng=None, progress=None, jit=False, profile=None):
+    """Run one stochastic trajectory and return the daily series named in SERIES_NAMES.
+
+    progress, if given, is called as progress(days_done, days) after every simulated day.
+    jit=True runs the day loop through the Numba kernel when possible, and profile collects
+    per-phase timings (see advance).
+    """
+    state = SimulationState.start(flip_supply, locked_flip, basic_nfts, complex_nfts)
+    series, _ = advance(state, days, P_0, K, r, daily_active_percentage, complex_nft_creation_percentage, rng=rng, progress=progress, jit=jit, profile=profile)
+    return series
@@ -0,0 +1,222 @@
+"""Plotly charts for simulation results. Plotly is only imported once a chart is built."""
+
+import base64
+
+import numpy as np
+
+from .downsample import downsample
+from .model import SERIES_NAMES
+
+# Longer series are drawn as this many LTTB points (the dashboard re-fetches detail on zoom)
+MAX_POINTS = 4000
+
+# Traces with more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 2000
+
+# Ensemble statistics drawn as bands
+BAND_STATS = ('p5', 'p50', 'p95')
+
+# Series drawn on the live chart while a run streams in, with their trace names
+LIVE_SERIES = {'flip_supply': 'Unlocked FLIP Supply', 'locked_flip': 'Locked FLIP'}
+
+# Points per live trace over a whole run; every update is downsampled to its share of them
+LIVE_POINTS = 1000
+
+
+def drawn_points(results, ensemble=None, max_points=MAX_POINTS, start=0):
+    """Every series (and band statistic) as drawn: {name or (name, stat): (days, values)}.
+
+    Series longer than max_points are downsampled with LTTB, all in one pass; days count
+    from `start`. max_points=None keeps every point.
+    """
+    keys = list(SERIES_NAMES)
+    if ensemble is not None:
+        keys += [(name, stat) for name in SERIES_NAMES for stat in BAND_STATS]
+    stacked = np.stack([results[key] if isinstance(key, str) else ensemble[key[0]][key[1]] for key in keys])
+    days, values = downsample(stacked, max_points or stacked.shape[1], start)
+    return {key: (days[i], values[i]) for i, key in enumerate(keys)}
+
+
+def line_trace(points, key, webgl_threshold=WEBGL_THRESHOLD, **kwargs):
+    """Line trace of one drawn series, in WebGL when it has more than webgl_threshold points."""
+    import plotly.graph_objects as go
+
+    days, values = points[key]
+    trace = go.Scattergl if len(days) > webgl_threshold else go.Scatter
+    return trace(x=days, y=values, mode='lines', **kwargs)
+
+
+def add_band(fig, points, name, label, webgl_threshold=WEBGL_THRESHOLD):
+    """Shade a series' p5-p95 band and draw its median when the points include an ensemble."""
+    if (name, 'p5') not in points:
+        return
+    fig.add_trace(line_trace(points, (name, 'p95'), webgl_threshold, line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(line_trace(points, (name, 'p5'), webgl_threshold, line=dict(width=0), fill='tonexty', name=f'{label} p5-p95'))
+    fig.add_trace(line_trace(points, (name, 'p50'), webgl_threshold, line=dict(dash='dot'), name=f'{label} Median'))
+
+
+def build_figures(results, ensemble=None, max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD):
+    """Build every chart from a {series name: daily array} dict, as {chart name: go.Figure}.
+
+    With an ensemble (as returned by run_ensemble), results should hold its means and
+    each time-series chart also gets the p5-p95 band and median. Long horizons are
+    downsampled to max_points and drawn with WebGL (see drawn_points and line_trace).
+    """
+    import plotly.graph_objects as go
+
+    points = drawn_points(results, ensemble, max_points)
+
+    def add_line(fig, name, label):
+        add_band(fig, points, name, label, webgl_threshold)
+        fig.add_trace(line_trace(points, name, webgl_threshold, name=label))
+
+    daily_flip_supply = results['flip_supply']
+    daily_locked_flip = results['locked_flip']
+
+    # Final Day Pie Chart Data
+    final_day_unlocked_flip = daily_flip_supply[-1]
+    final_day_locked_flip = daily_locked_flip[-1]
+
+    # Pie Chart for Locked vs Unlocked FLIP
+    pie_fig = go.Figure(data=[go.Pie(
+        labels=['Unlocked', 'Locked'],
+        values=[final_day_unlocked_flip, final_day_locked_flip],
+        title='Locked vs Unlocked FLIP',
+        textinfo='percent+label',
+        pull=[0.1, 0],  # Slightly pull out the largest section
+        hoverinfo='label+percent',  # Show label and percent on hover
+        direction='clockwise',  # Ensure the layout is ordered clockwise
+        sort=False,  # Don't sort the values
+        insidetextorientation='radial'  # Arrange text to avoid overlap
+    )])
+
+    # Update traces to set the text position to outside and add connector lines
+    pie_fig.update_traces(
+        textposition='outside',
+        textfont_size=8,
+        marker=dict(line=dict(color='#000000', width=1))
+    )
+
+    # Update the layout to adjust the pie chart size, margins, and domain
+    pie_fig.update_layout(
+        height=600,  # Height of the pie chart
+        width=2100,  # Width to match the line graph width
+        showlegend=False,  # Hide the legend if needed
+        title_y=0.95  # Vertically raise the title by 50 pixels
+    )
+
+    # Separate charts for Locked and Unlocked FLIP supply
+    flip_fig = go.Figure()
+    add_line(flip_fig, 'flip_supply', 'Unlocked FLIP Supply')
+    add_line(flip_fig, 'locked_flip', 'Locked FLIP')
+    flip_fig.update_layout(title='FLIP Supply Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='FLIP Type')
+
+    # Separate charts for Unlocked and Locked FLIP supply
+    unlocked_flip_fig = go.Figure()
+    add_line(unlocked_flip_fig, 'flip_supply', 'Unlocked FLIP Supply')
+    unlocked_flip_fig.update_layout(title='Unlocked FLIP Supply Over Time', xaxis_title='Day', yaxis_title='Count')
+
+    locked_flip_fig = go.Figure()
+    add_line(locked_flip_fig, 'locked_flip', 'Locked FLIP')
+    locked_flip_fig.update_layout(title='Locked FLIP Over Time', xaxis_title='Day', yaxis_title='Count')
+
+    # Separate chart for basic NFTs
+    basic_nft_fig = go.Figure()
+    add_line(basic_nft_fig, 'basic_nfts_4x4', '4x4 Basic NFTs')
+    add_line(basic_nft_fig, 'basic_nfts_8x8', '8x8 Basic NFTs')
+    basic_nft_fig.update_layout(title='Basic NFT Creation Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='NFT Type')
+
+    # Cumulative NFT charts
+    cumulative_nft_fig = go.Figure()
+    cumulative_nft_fig.add_trace(line_trace(points, 'cumulative_basic_nfts_4x4', webgl_threshold, name='Cumulative 4x4 Basic NFTs'))
+    cumulative_nft_fig.add_trace(line_trace(points, 'cumulative_basic_nfts_8x8', webgl_threshold, name='Cumulative 8x8 Basic NFTs'))
+    cumulative_nft_fig.update_layout(title='Cumulative Basic NFT Creation Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='NFT Type')
+
+    # Separate chart for complex NFTs
+    complex_nft_fig = go.Figure()
+    add_line(complex_nft_fig, 'complex_nfts', 'Complex NFTs')
+    complex_nft_fig.update_layout(title='Complex NFT Creation Over Time', xaxis_title='Day', yaxis_title='Count')
+
+    # Separate chart for player growth
+    player_fig = go.Figure()
+    player_fig.add_trace(line_trace(points, 'players', webgl_threshold, name='Player Growth'))
+    player_fig.update_layout(title='Player Growth Over Time', xaxis_title='Day', yaxis_title='Count', legend_title='Metric')
+
+    return {
+        'pie': pie_fig,
+        'flip': flip_fig,
+        'unlocked_flip': unlocked_flip_fig,
+        'locked_flip': locked_flip_fig,
+        'basic_nfts': basic_nft_fig,
+        'cumulative_nfts': cumulative_nft_fig,
+        'complex_nfts': complex_nft_fig,
+        'players': player_fig,
+    }
+
+
+def build_live_figure():
+    """Empty chart with one trace per LIVE_SERIES, for a run to be streamed into with extendData."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure([go.Scatter(x=[], y=[], mode='lines', name=label) for label in LIVE_SERIES.values()])
+    fig.update_layout(title='FLIP Supply (live)', xaxis_title='Day', yaxis_title='Count', legend_title='FLIP Type')
+    return fig
+
+
+def live_update(results, run, seq, first=0, days=None, max_points=LIVE_POINTS):
+    """Update `seq` of the live chart streaming `run`: days first.. of `results` as extendData.
+
+    Returns {'run', 'seq', 'reset', 'extend'}. With first=0 the update replaces whatever
+    the chart shows (a reset, with maxPoints equal to its length); otherwise it extends
+    it, and the browser applies it only right after update seq - 1 (live in
+    assets/flipsim_charts.js). Every stretch is sent as its LTTB points, its share of
+    max_points over a run of `days` (by default, the days in `results`).
+    """
+    total = max(days or len(results['players']), 1)
+    stacked = np.stack([np.asarray(results[name][first:], dtype=float) for name in LIVE_SERIES])
+    count = stacked.shape[1]
+    kept, values = downsample(stacked, max(-(-max_points * count // total), 2), first)
+    extend = [dict(x=kept.tolist(), y=values.tolist()), list(range(len(LIVE_SERIES)))]
+    if first == 0:
+        extend.append(max(values.shape[1], 1))
+    return {'run': run, 'seq': seq, 'reset': first == 0, 'extend': extend}
+
+
+def encode_array(values, dtype='f4'):
+    """Plotly typed-array spec ({'dtype', 'bdata'}) of a series, base64 little-endian.
+
+    Plotly.js reads these wherever it takes an array, so charts can use them as they are.
+    float32 keeps about seven significant digits, plenty for drawing.
+    """
+    data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': dtype, 'bdata': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def encode_results(results, ensemble=None, dtype='f4', max_points=MAX_POINTS, start=0, webgl_threshold=WEBGL_THRESHOLD):
+    """Every series once, as typed arrays, for charts composed in the browser.
+
+    Returns {'days', 'start', 'webgl_threshold', 'series': {name: entry},
+    'bands': {name: {stat: entry}} or None}, where each entry holds 'y', its point count
+    'n' and, when LTTB dropped points (see drawn_points), the kept days as 'x'. Without
+    'x' the days run on from `start` (x0=start, dx=1) and are not sent at all.
+    """
+    days = len(results['players'])
+    points = drawn_points(results, ensemble, max_points, start)
+
+    def entry(key):
+        kept, values = points[key]
+        encoded = {'y': encode_array(values, dtype), 'n': len(values)}
+        if len(values) < days:
+            encoded['x'] = encode_array(kept, dtype)
+        return encoded
+
+    bands = None
+    if ensemble is not None:
+        bands = {name: {stat: entry((name, stat)) for stat in BAND_STATS} for name in SERIES_NAMES}
+    return {
+        'days': days,
+        'start': start,
+        'webgl_threshold': webgl_threshold,
+        'series': {name: entry(name) for name in SERIES_NAMES},
+        'bands': bands,
+    }
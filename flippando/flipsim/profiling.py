@@ -0,0 +1,91 @@
+"""Per-phase timing of simulation runs and chart building, and cProfile dumps of single runs."""
+
+import cProfile
+import time
+from contextlib import contextmanager, nullcontext
+
+# Phases of one simulated day, in the order advance() runs them
+DAY_PHASES = ('players', 'minting', 'basic_nfts', 'complex_nfts', 'bookkeeping')
+
+
+class Profile:
+    """Cumulative wall time and call count for each named phase.
+
+    Pass one to run_simulation/advance (profile=...) to time the phases of the day loop,
+    or use phase() around coarser steps such as building figures. Phases are kept in the
+    order they were first recorded.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add_day_loop(self, stamps, prefix='day/'):
+        """Record the day-loop phases from the perf_counter stamps advance() takes.
+
+        stamps holds len(DAY_PHASES) + 1 stamps per day: one at the start of the day and
+        one after each phase.
+        """
+        width = len(DAY_PHASES) + 1
+        days = len(stamps) // width
+        for j, name in enumerate(DAY_PHASES):
+            total = sum(stamps[i * width + j + 1] - stamps[i * width + j] for i in range(days))
+            self.add(prefix + name, total, days)
+
+    def merge(self, other):
+        for name, seconds in other.seconds.items():
+            self.add(name, seconds, other.calls[name])
+        return self
+
+    def to_dict(self):
+        """{phase: {'seconds', 'calls'}}, plain Python values that serialize to JSON."""
+        return {name: dict(seconds=seconds, calls=self.calls[name]) for name, seconds in self.seconds.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        for name, entry in data.items():
+            profile.add(name, entry['seconds'], entry['calls'])
+        return profile
+
+    def rows(self):
+        """(phase, seconds, calls, microseconds per call), slowest phase first."""
+        return [
+            (name, seconds, self.calls[name], seconds / self.calls[name] * 1e6 if self.calls[name] else 0.0)
+            for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        ]
+
+    def table(self):
+        lines = [f'{"phase":<24}{"total":>12}{"calls":>10}{"per call":>14}']
+        for name, seconds, calls, per_call in self.rows():
+            lines.append(f'{name:<24}{seconds * 1000:>9.2f} ms{calls:>10}{per_call:>11.1f} us')
+        return '\n'.join(lines)
+
+
+def phase(profile, name):
+    """profile.phase(name), or a no-op context when profiling is off (profile is None)."""
+    return nullcontext() if profile is None else profile.phase(name)
+
+
+def dump_cprofile(path, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) under cProfile, write the stats to `path` and return fn's result.
+
+    The file loads with pstats.Stats(path) or snakeviz.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
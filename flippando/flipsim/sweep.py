@@ -0,0 +1,95 @@
+"""Parameter sweeps over run_simulation arguments, gathered into a labelled DataFrame."""
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .model import SERIES_NAMES, run_simulation
+
+
+def final_values(results):
+    """Default sweep metric: the last-day value of every series."""
+    return {name: series[-1] for name, series in zip(SERIES_NAMES, results)}
+
+
+def grid_points(sweep):
+    """Cartesian product of {name: values}, as a list of {name: value} dicts."""
+    names = list(sweep)
+    return [dict(zip(names, values)) for values in itertools.product(*sweep.values())]
+
+
+def latin_hypercube_points(sweep, samples, seed=None):
+    """Latin hypercube sample of {name: (low, high)} ranges, as a list of {name: value} dicts.
+
+    Each range is cut into `samples` equal strata and every stratum is hit exactly once.
+    Ranges given with integer bounds are sampled as integers.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in sweep.items():
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        values = low + strata * (high - low)
+        if isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+            values = np.round(values).astype(int)
+        columns[name] = values.tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _run_points(params, points, seed, metrics):
+    """Run one chunk of sweep points in a worker."""
+    return [
+        metrics(run_simulation(**{**params, **point}, rng=np.random.default_rng(seed)))
+        for point in points
+    ]
+
+
+def run_sweep(params, sweep, method='grid', samples=None, seed=0, metrics=final_values,
+              max_workers=None, chunk_size=None):
+    """Run run_simulation over a grid of its arguments and return one row of metrics per point.
+
+    params holds the fixed run_simulation arguments. With method='grid', sweep maps argument
+    names to the values to try (like vbt.Param), and every combination is run. With
+    method='lhs', it maps names to (low, high) ranges and `samples` Latin hypercube points
+    are drawn. Every point uses the same seed (common random numbers), so differences
+    between points come from the parameters rather than from the noise.
+
+    The result is a DataFrame indexed by a MultiIndex of the swept arguments, with one
+    column per metric (by default the final value of every series).
+    """
+    if method == 'grid':
+        points = grid_points(sweep)
+    elif method == 'lhs':
+        if not samples or samples < 1:
+            raise ValueError(f"method='lhs' needs a positive number of samples, got {samples!r}")
+        points = latin_hypercube_points(sweep, samples, seed)
+    else:
+        raise ValueError(f"Unknown sweep method {method!r}, expected 'grid' or 'lhs'")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(len(points) / (max_workers * 4)))
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+
+    if max_workers == 1 or len(chunks) == 1:
+        rows = [row for chunk in chunks for row in _run_points(params, chunk, seed, metrics)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            n = len(chunks)
+            results = executor.map(_run_points, [params] * n, chunks, [seed] * n, [metrics] * n)
+            rows = [row for chunk in results for row in chunk]
+
+    index = pd.MultiIndex.from_tuples([tuple(point.values()) for point in points], names=list(sweep))
+    return pd.DataFrame(rows, index=index)
+
+
+def plot_heatmap(results, x, y, metric='flip_supply'):
+    """Heatmap of one metric over two swept arguments, averaged over any other swept ones."""
+    import plotly.graph_objects as go
+
+    table = results.reset_index().pivot_table(index=y, columns=x, values=metric, aggfunc='mean')
+    fig = go.Figure(go.Heatmap(x=table.columns, y=table.index, z=table.values, colorbar=dict(title=metric)))
+    fig.update_layout(title=f'{metric} by {x} and {y}', xaxis_title=x, yaxis_title=y)
+    return fig
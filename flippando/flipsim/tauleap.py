@@ -0,0 +1,140 @@
+"""Tau-leaping engine: the economy as event rates within the day, stepped a day or an hour at a time.
+
+The daily loop mints every puzzle of the day before any complex NFT is made, so at large K
+the pools are drained to the zero clamp before creators get to them. Here puzzle solving
+and complex NFT creation are Poisson processes with rates from logistic_growth and the
+activity and creation percentages, and basic NFTs flow in continuously. A day is taken as
+one step (tau-leaping) when no pool expects to lose over `epsilon` of itself to it, and
+hour by hour otherwise, as while a pool runs dry or stays near empty. Within a step the
+events keep the daily loop's order: minting, the new basic NFTs, then complex NFTs, so
+epsilon=0 is the daily loop run hour by hour.
+
+Hours are not looped over one by one. The rates depend on time alone, so every hour's
+solves and creators are drawn up front. Until a complex NFT demand fits, each pool
+follows a clamped running balance that cumulative sums give for many hours at once, so
+the hours are stepped through in whole-array spans that end only where a demand could
+fit or a day could be taken whole.
+"""
+
+import numpy as np
+
+from .meanfield import reflected
+from .model import create_complex_nfts, logistic_growth, mint_flip_tokens, nfts_used_for_complex
+
+STEPS_PER_DAY = 24  # the finest step is one hour
+BLOCK_DAYS = 32  # days of complex NFT demands drawn at once, and the longest span of hours
+
+
+def inflow(day, initial_supply, growth_rate, tau):
+    """Basic NFTs created from `day` over tau days, create_basic_nfts' rate integrated."""
+    return tau * (initial_supply + growth_rate * (day + tau / 2))
+
+
+def run_tau_leaping(days, P_0, K, r, daily_active_percentage, flip_supply, locked_flip, basic_nfts, complex_nfts,
+                    complex_nft_creation_percentage, rng=None, epsilon=0.03, progress=None):
+    """Run the model with sub-daily tau-leaping and return (series, steps).
+
+    series matches run_simulation's tuple, recorded at the end of every day. Every hour
+    mints Poisson(solves per day / 24) puzzles, half of them 8x8 as in the daily loop, adds
+    the basic NFTs created over the hour and settles Poisson(creators per day / 24) complex
+    NFT demands in order, with rates taken at the start of the hour. A day is one step when
+    epsilon times every pool at its start covers the pool's expected drain over the day;
+    it then does the same with the day's totals. steps[i] is the number of steps day i
+    took, 1 or STEPS_PER_DAY. rng is a numpy Generator or a seed.
+    """
+    rng = np.random.default_rng(rng)
+    sizes = ('4x4', '8x8')
+    per_solve = np.array([mint_flip_tokens(size) for size in sizes])
+    mean_demand = 32
+    hours_total = days * STEPS_PER_DAY
+
+    # Every hour's events and new basic NFTs, with the pools as rows
+    now = np.arange(hours_total) / STEPS_PER_DAY
+    players = logistic_growth(now, P_0, K, r)
+    solves = rng.poisson(players * daily_active_percentage / STEPS_PER_DAY)
+    solved_8x8 = rng.binomial(solves, 0.5)
+    minted = np.stack([solves - solved_8x8, solved_8x8]) * per_solve[:, None]
+    all_minted = minted.sum(axis=0)
+    added = np.stack([inflow(now, 1, 0.05, 1 / STEPS_PER_DAY), inflow(now, 0.5, 0.025, 1 / STEPS_PER_DAY)])
+    creators = rng.poisson(players * complex_nft_creation_percentage / STEPS_PER_DAY)
+    first_demand = np.concatenate([[0], np.cumsum(creators)])  # index of each hour's first demand
+    # Basic NFTs created before each hour's minting, which opens the 8x8 canvas
+    canvas_8x8 = sum(basic_nfts.values()) + np.cumsum(all_minted) - all_minted >= 1000
+
+    # Expected NFTs leaving each pool over each day: half the solves each, and every
+    # creator's demand from the 8x8 pool once unlocked, the 4x4 pool before
+    day_start = np.arange(days) * STEPS_PER_DAY
+    solve_rate = players[day_start] * daily_active_percentage
+    create_demand = players[day_start] * complex_nft_creation_percentage * mean_demand
+    opened = canvas_8x8[day_start]
+    drains = solve_rate / 2 * per_solve[:, None] + np.stack([np.where(opened, 0, create_demand),
+                                                             np.where(opened, create_demand, 0)])
+
+    pools = np.array([basic_nfts[size] for size in sizes], dtype=float)
+    start_pools = pools.copy()
+    end_pools = np.zeros((len(sizes), days))
+    flip_series, locked_series, complex_series = np.zeros(days), np.zeros(days), np.zeros(days)
+    steps = np.zeros(days, dtype=np.int64)
+
+    def settle(first, last, pools):
+        # Complex NFTs from the demands of hours first .. last - 1, against the pools
+        nonlocal flip_supply, locked_flip, complex_nfts
+        available = dict(zip(sizes, pools))
+        used = demands[first_demand[first] - base:first_demand[last] - base]
+        flip_unlocked, complex_created = create_complex_nfts(used, available, '8x8' if canvas_8x8[first] else '4x4')
+        flip_supply = max(flip_supply + flip_unlocked, 0)
+        locked_flip = max(locked_flip - flip_unlocked, 0)
+        complex_nfts = max(complex_nfts + complex_created, 0)
+        return np.array([available[size] for size in sizes])
+
+    smallest = np.full(hours_total, np.inf)  # each hour's smallest demand, drawn a block at a time
+    hour = block_end = 0
+    while hour < hours_total:
+        day, into_day = divmod(hour, STEPS_PER_DAY)
+        if hour >= block_end:
+            block_start, block_end = hour, min(hour + BLOCK_DAYS * STEPS_PER_DAY, hours_total)
+            base = first_demand[block_start]
+            demands = nfts_used_for_complex(mean_demand, 10, int(first_demand[block_end] - base), rng)
+            busy = block_start + np.flatnonzero(creators[block_start:block_end])
+            if len(busy):
+                smallest[busy] = np.minimum.reduceat(demands, first_demand[busy] - base)
+
+        if into_day == 0 and np.all(epsilon * pools >= drains[:, day]):
+            # One step for the whole day; pools clamp at zero as in the daily loop
+            hours = slice(hour, hour + STEPS_PER_DAY)
+            pools = np.maximum(pools - minted[:, hours].sum(axis=1), 0) + added[:, hours].sum(axis=1)
+            locked_flip += all_minted[hours].sum()
+            pools = settle(hour, hour + STEPS_PER_DAY, pools)
+            end_pools[:, day], steps[day] = pools, 1
+            flip_series[day], locked_series[day], complex_series[day] = flip_supply, locked_flip, complex_nfts
+            hour += STEPS_PER_DAY
+        else:
+            # Hour by hour up to the first hour a demand could fit, or the first day that
+            # could be taken whole, with the pools' running balance until then
+            rest = slice(hour, block_end)
+            balance = reflected(pools, added[:, rest] - minted[:, rest], added[:, rest])
+            locked = locked_flip + np.cumsum(all_minted[rest])
+            fits = np.flatnonzero(smallest[rest] <= balance.max(axis=0))
+            starts = np.arange(STEPS_PER_DAY - into_day, block_end - hour, STEPS_PER_DAY)
+            whole = starts[np.all(epsilon * balance[:, starts - 1] >= drains[:, day + 1:day + 1 + len(starts)], axis=0)]
+            span = min(fits[0] + 1 if len(fits) else block_end - hour, whole[0] if len(whole) else block_end - hour)
+            ends = np.arange(STEPS_PER_DAY - 1 - into_day, span, STEPS_PER_DAY)
+            ended = day + np.arange(len(ends))
+            end_pools[:, ended], steps[ended] = balance[:, ends], STEPS_PER_DAY
+            flip_series[ended], locked_series[ended], complex_series[ended] = flip_supply, locked[ends], complex_nfts
+            pools, locked_flip = balance[:, span - 1], locked[span - 1]
+            hour += span
+            if len(fits) and fits[0] + 1 == span:
+                pools = settle(hour - 1, hour, pools)
+                if hour % STEPS_PER_DAY == 0:
+                    end_pools[:, ended[-1]] = pools
+                    flip_series[ended[-1]], locked_series[ended[-1]], complex_series[ended[-1]] = (
+                        flip_supply, locked_flip, complex_nfts)
+        if progress is not None and hour % STEPS_PER_DAY == 0:
+            progress(hour // STEPS_PER_DAY, days)
+
+    # Pools at the start of each day are those the day before left
+    cumulative = np.cumsum(np.column_stack([start_pools, end_pools[:, :-1]]), axis=1)
+    series = (flip_series, locked_series, end_pools[0], end_pools[1], complex_series,
+              logistic_growth(np.arange(days), P_0, K, r), cumulative[0], cumulative[1])
+    return series, steps
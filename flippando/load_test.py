@@ -0,0 +1,155 @@
+"""Load test for the dashboard: callback latency as the number of concurrent sessions grows.
+
+Start the dashboard first, e.g. under gunicorn as in the README, then run
+
+    python load_test.py --url http://127.0.0.1:8050 --sessions 1 2 4 8 16
+
+Every session loads the page like a browser does, then repeatedly changes the parameters
+(the update_charts background callback, polled to completion) and zooms the flip chart
+(zoom_window). Sessions draw their parameters from a small pool, as analysts looking at the
+same scenarios do, so the shared result store gets to serve one session's run to the others.
+Each level of concurrency uses fresh seeds, so it starts from nothing cached. The table
+gives p50/p99 latency per callback, from the first request to the final response.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CONFIG = re.compile(r'<script id="_dash-config" type="application/json">(.*?)</script>', re.S)
+
+
+def parse_output(output):
+    """[(id, property)] of a callback's output string, and whether it has several."""
+    multi = output.startswith('..')
+    names = output.strip('.').split('...') if multi else [output]
+    return [tuple(name.split('@')[0].rsplit('.', 1)) for name in names], multi
+
+
+def layout_values(node, values=None):
+    """{component id: props} of every component in a /_dash-layout tree."""
+    values = {} if values is None else values
+    if isinstance(node, list):
+        for child in node:
+            layout_values(child, values)
+    elif isinstance(node, dict) and 'props' in node:
+        props = node['props']
+        if 'id' in props:
+            values[props['id']] = props
+        layout_values(props.get('children'), values)
+    return values
+
+
+class Session:
+    """One browser tab: its page load token, the app's callbacks and the inputs' current values."""
+
+    def __init__(self, url, poll_interval):
+        self.poll_interval = poll_interval
+        config = json.loads(CONFIG.search(self.get(url).decode()).group(1))
+        self.base = url.rstrip('/') + config['requests_pathname_prefix']
+        self.end_id = config.get('end_id')
+        self.values = layout_values(json.loads(self.get(self.base + '_dash-layout')))
+        self.callbacks = {callback['output']: callback for callback in json.loads(self.get(self.base + '_dash-dependencies'))}
+
+    def get(self, url):
+        with urllib.request.urlopen(url) as response:
+            return response.read()
+
+    def post(self, body, **args):
+        query = '&'.join(f'{name}={value}' for name, value in {'endId': self.end_id, **args}.items() if value)
+        request = urllib.request.Request(
+            f'{self.base}_dash-update-component?{query}', data=json.dumps(body).encode(),
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+
+    def call(self, output, changed, **values):
+        """Run the callback writing `output` after `changed` (id.property) took a new value.
+
+        values are {id: value} for inputs and states, anything else keeps its layout value.
+        Returns the response, or None when the callback prevented the update.
+        """
+        callback = self.callbacks[next(name for name in self.callbacks if output in name)]
+        outputs, multi = parse_output(callback['output'])
+        def entries(deps):
+            return [dict(dep, value=values.get(dep['id'], self.values[dep['id']].get(dep['property']))) for dep in deps]
+        body = dict(
+            output=callback['output'],
+            outputs=[dict(id=i, property=p) for i, p in outputs] if multi else dict(id=outputs[0][0], property=outputs[0][1]),
+            inputs=entries(callback['inputs']), state=entries(callback['state']), changedPropIds=[changed],
+        )
+        status, data = self.post(body)
+        if callback.get('background'):
+            # Background callbacks answer with a job handle, then are polled until the result comes
+            handles = json.loads(data)
+            for entry in body['inputs'] + body['state']:
+                entry['value'] = None
+            while status == 200 and 'response' not in json.loads(data):
+                time.sleep(self.poll_interval)
+                status, data = self.post(body, cacheKey=handles['cacheKey'], job=handles['job'])
+        return json.loads(data)['response'] if status == 200 else None
+
+
+def run_session(url, rng, pool, requests, poll_interval, latencies, lock):
+    session = Session(url, poll_interval)
+    for _ in range(requests):
+        params = pool[rng.integers(len(pool))]
+        start = time.perf_counter()
+        response = session.call('series-store.data', 'k-input.value', **params)
+        mid = time.perf_counter()
+        payload = response['series-store']['data']
+        days = params['days-input']
+        session.call(
+            'window-store.data', 'flip-chart.relayoutData',
+            **{'flip-chart': {'xaxis.range[0]': days // 3, 'xaxis.range[1]': days // 3 + 365}, 'series-store': payload},
+        )
+        end = time.perf_counter()
+        with lock:
+            latencies['update_charts'].append(mid - start)
+            latencies['zoom_window'].append(end - mid)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='concurrent sessions per level')
+    parser.add_argument('--requests', type=int, default=5, help='parameter changes per session')
+    parser.add_argument('--distinct', type=int, default=4, help='parameter sets the sessions of a level share')
+    parser.add_argument('--days', type=int, default=365 * 20, help='horizon, long enough for zooms to fetch data')
+    parser.add_argument('--poll-interval', type=float, default=0.05, help='seconds between polls of a background callback')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    print(f'{"sessions":>8} {"callback":>14} {"calls":>6} {"p50 ms":>9} {"p99 ms":>9} {"max ms":>9} {"calls/s":>8}')
+    for level, sessions in enumerate(args.sessions):
+        pool = [
+            {'days-input': args.days, 'k-input': int(k), 'seed-input': int(rng.integers(2**31))}
+            for k in rng.choice([1e5, 3e5, 1e6, 3e6], args.distinct)
+        ]
+        latencies, lock = {'update_charts': [], 'zoom_window': []}, threading.Lock()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(sessions) as pool_executor:
+            futures = [
+                pool_executor.submit(run_session, args.url, np.random.default_rng([args.seed, level, i]), pool,
+                                     args.requests, args.poll_interval, latencies, lock)
+                for i in range(sessions)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+        for name, values in latencies.items():
+            ms = np.array(values) * 1000
+            print(f'{sessions:>8} {name:>14} {len(ms):>6} {np.percentile(ms, 50):>9.1f} {np.percentile(ms, 99):>9.1f} '
+                  f'{ms.max():>9.1f} {len(ms) / elapsed:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Backtests of every entry signal against every exit signal, in memory-bounded batches.
+
+entries.vbt.x(exits) followed by one Portfolio.from_signals builds every combination's
+signals and portfolio state at once, which outgrows memory as patterns or symbols are
+added. total_returns() instead backtests a batch of (entry, exit) pairs at a time, sized
+so the batches in flight stay under a memory ceiling, keeps only each column's total
+return and runs the batches in worker processes.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import pandas as pd
+
+# Rough bytes one bar of one backtested column takes: the close price, both signals and
+# the float arrays Portfolio.from_signals fills per bar (cash, position, value, returns ...)
+BYTES_PER_CELL = 64
+
+# Inputs of the current grid, set before the workers fork so batches are not pickled to them
+_grid = {}
+
+
+def batch_size(n_bars, n_columns, max_memory, processes=1):
+    """Pairs per batch so `processes` batches of n_columns columns each fit in max_memory bytes."""
+    pair_bytes = n_bars * n_columns * BYTES_PER_CELL
+    return max(1, int(max_memory // (processes * pair_bytes)))
+
+
+def pair_signals(frame, pairs, side):
+    """Columns of `frame` for `side` (0 entries, 1 exits) of each pair, keyed (entry, exit, *columns)."""
+    return pd.concat([frame[pair[side]] for pair in pairs], axis=1, keys=pairs, names=_grid["levels"])
+
+
+def _backtest(pairs):
+    import vectorbtpro as vbt
+
+    entries, exits, close = _grid["entries"], _grid["exits"], _grid["close"]
+    pf = vbt.Portfolio.from_signals(
+        pd.concat([close] * len(pairs), axis=1, keys=pairs, names=_grid["levels"]),
+        pair_signals(entries, pairs, 0),
+        pair_signals(exits, pairs, 1),
+        **_grid["portfolio_kwargs"],
+    )
+    return pf.total_return
+
+
+def total_returns(close, entries, exits, max_memory=2 * 1024 ** 3, processes=None, **portfolio_kwargs):
+    """Total return of every entry pattern against every exit pattern, per symbol.
+
+    entries and exits have columns keyed by pattern, then the columns of close (as
+    PatternRanges.last_pd_mask gives them). The result is a Series indexed by (entry
+    pattern, exit pattern, *close columns), as pf.total_return over entries.vbt.x(exits)
+    would be. Batches of pairs run in `processes` forked worker processes (one per CPU
+    for None, in-process for 1), sized to keep all batches in flight under max_memory bytes.
+    """
+    entry_names = entries.columns.get_level_values(0).unique()
+    exit_names = exits.columns.get_level_values(0).unique()
+    pairs = list(product(entry_names, exit_names))
+    workers = processes or multiprocessing.cpu_count()
+    size = batch_size(len(close), close.shape[1], max_memory, workers)
+    batches = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+
+    _grid.update(
+        close=close,
+        entries=entries,
+        exits=exits,
+        levels=[entries.columns.names[0], exits.columns.names[0]],
+        portfolio_kwargs=portfolio_kwargs,
+    )
+    try:
+        if workers == 1 or len(batches) == 1:
+            results = list(map(_backtest, batches))
+        else:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                results = list(pool.map(_backtest, batches))
+    finally:
+        _grid.clear()
+    return pd.concat(results)
@@ -0,0 +1,148 @@
+"""Local Parquet store of OHLCV bars, so the scripts pull from the network only what is new.
+
+Bars live in one Parquet file per timeframe and symbol (STORE_DIR/<timeframe>/<symbol>.parquet)
+and are read memory-mapped. pull_cached() wraps a vectorbtpro data class: it loads the
+stored bars, pulls only the bars since the last stored timestamp (and any before the
+first one that an earlier start asks for), merges them in and returns the same Data
+object the class's own pull() would.
+
+Set BAR_STORE_OFFLINE=1 to never touch the network, and BAR_STORE_DIR to move the store.
+"""
+
+import os
+import re
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = os.environ.get("BAR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bar_store"))
+OFFLINE = os.environ.get("BAR_STORE_OFFLINE", "") not in ("", "0")
+
+# Parquet metadata key holding the earliest start the stored bars were pulled from
+PULLED_FROM_KEY = b"bar_store.pulled_from"
+
+
+def bar_path(symbol, timeframe, store_dir=STORE_DIR):
+    def safe(name):
+        return re.sub(r"[^\w.-]+", "_", str(name))
+
+    return os.path.join(store_dir, safe(timeframe), safe(symbol) + ".parquet")
+
+
+def read_bars(symbol, timeframe, store_dir=STORE_DIR):
+    """Stored bars as a DataFrame indexed by timestamp, or None if nothing is stored yet."""
+    path = bar_path(symbol, timeframe, store_dir)
+    if not os.path.exists(path):
+        return None
+    return pq.read_table(path, memory_map=True).to_pandas()
+
+
+def last_timestamp(symbol, timeframe, store_dir=STORE_DIR):
+    """Timestamp of the newest stored bar, read from the index column alone."""
+    path = bar_path(symbol, timeframe, store_dir)
+    if not os.path.exists(path):
+        return None
+    index_name = pq.read_schema(path).pandas_metadata["index_columns"][0]
+    index = pq.read_table(path, columns=[index_name], memory_map=True).to_pandas().index
+    return index[-1] if len(index) else None
+
+
+def pulled_from(symbol, timeframe, store_dir=STORE_DIR):
+    """Earliest start the stored bars were pulled from, which may precede the first bar."""
+    path = bar_path(symbol, timeframe, store_dir)
+    if not os.path.exists(path):
+        return None
+    value = (pq.read_schema(path).metadata or {}).get(PULLED_FROM_KEY)
+    return pd.Timestamp(value.decode()) if value else None
+
+
+def append_bars(symbol, timeframe, bars, store_dir=STORE_DIR, start=None):
+    """Merge new bars into the store and return everything stored for the symbol.
+
+    Bars at timestamps already stored replace the stored ones, since the last bar of a
+    previous pull may have still been forming. The earliest start the bars were pulled
+    from is kept alongside them (see pulled_from). The file is replaced atomically.
+    """
+    stored = read_bars(symbol, timeframe, store_dir)
+    since = pulled_from(symbol, timeframe, store_dir)
+    if since is not None:
+        start = since if start is None else min(start, since)
+    if stored is not None and len(bars):
+        bars = pd.concat([stored, bars])
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+    elif stored is not None and start == since:
+        return stored
+    elif stored is not None:
+        bars = stored
+    else:
+        bars = bars.sort_index()
+
+    path = bar_path(symbol, timeframe, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".parquet")
+    os.close(fd)
+    table = pa.Table.from_pandas(bars)
+    if start is not None:
+        table = table.replace_schema_metadata({**table.schema.metadata, PULLED_FROM_KEY: start.isoformat().encode()})
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return bars
+
+
+def to_timestamp(when, tz=None):
+    """pd.Timestamp of a date or of a relative phrase such as "one year ago" (via dateparser)."""
+    try:
+        stamp = pd.Timestamp(when)
+    except ValueError:
+        import dateparser
+
+        stamp = pd.Timestamp(dateparser.parse(when, settings=dict(RETURN_AS_TIMEZONE_AWARE=True)))
+    if tz is not None:
+        stamp = stamp.tz_localize(tz) if stamp.tzinfo is None else stamp.tz_convert(tz)
+    return stamp
+
+
+def pull_cached(data_cls, symbols, timeframe, start=None, max_age=None, offline=OFFLINE, store_dir=STORE_DIR, **pull_kwargs):
+    """Like data_cls.pull(symbols, timeframe=timeframe, start=start), through the local store.
+
+    For each symbol only the bars from the last stored timestamp on are pulled (everything
+    from `start` the first time), and the bars returned start at `start` as with pull().
+    A start earlier than any stored symbol was pulled from also pulls the bars up to the
+    first stored one. A symbol whose newest bar is younger than max_age (a Timedelta or
+    string like "1 hour") is not pulled for new bars, and offline=True never pulls.
+    data_cls is a vectorbtpro data class such as vbt.YFData or vbt.TVData; dateparser,
+    which it installs, reads relative starts like "one year ago".
+    """
+    single = isinstance(symbols, str)
+    frames = {}
+    for symbol in [symbols] if single else symbols:
+        stored = read_bars(symbol, timeframe, store_dir)
+        if offline:
+            if stored is None:
+                raise FileNotFoundError(f"No stored {timeframe} bars for {symbol} in {store_dir} and pulling is off")
+            frames[symbol] = stored
+            continue
+        if stored is not None and len(stored) and start is not None:
+            first = to_timestamp(start, stored.index.tz)
+            since = pulled_from(symbol, timeframe, store_dir)
+            if first < stored.index[0] and (since is None or first < since):
+                head = data_cls.pull(symbol, timeframe=timeframe, start=first, end=stored.index[0], **pull_kwargs).get()
+                stored = append_bars(symbol, timeframe, head, store_dir, start=first)
+        since = stored.index[-1] if stored is not None and len(stored) else None
+        fresh = since is not None and max_age is not None and pd.Timestamp.now(tz=since.tz) - since < pd.Timedelta(max_age)
+        if fresh:
+            frames[symbol] = stored
+            continue
+        new = data_cls.pull(symbol, timeframe=timeframe, start=start if since is None else since, **pull_kwargs).get()
+        first = to_timestamp(start, new.index.tz) if since is None and start is not None else None
+        frames[symbol] = append_bars(symbol, timeframe, new, store_dir, start=first)
+
+    if start is not None:
+        frames = {symbol: bars[bars.index >= to_timestamp(start, bars.index.tz)] for symbol, bars in frames.items()}
+    return data_cls.from_data(frames[symbols] if single else frames)
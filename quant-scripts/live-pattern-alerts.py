@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+
+from bar_store import STORE_DIR, read_bars
+from pattern_alerts import PatternAlerts, run_alerts
+from pattern_search import BEARISH_PATTERNS, BULLISH_PATTERNS, PatternIndex
+from synthetic_data import generate_bars, replay_feed, save_replay
+
+symbols = [
+    "NASDAQ:META",
+    "NASDAQ:AMZN",
+    "NASDAQ:AAPL",
+    "NASDAQ:NFLX",
+    "NASDAQ:GOOG",
+]
+timeframe = "hourly"
+
+min_window = 24
+max_window = 24 * 30
+interp_mode = "linear"  # how templates are stretched to a window, one of pattern_search.INTERP_MODES
+
+replay_fname = os.path.join(STORE_DIR, "replay.parquet")  # next to the stored bars, out of git
+replay_interval = 0.0  # seconds between bars, 0 to replay as fast as possible
+synthetic_bars = 24 * 365  # bars generated for a symbol with nothing in the bar store
+
+# Replay what trend-detection-vectorbt last stored, or synthetic bars without the store
+
+frames = {}
+for symbol in symbols:
+    bars = read_bars(symbol, timeframe)
+    if bars is None:
+        bars, _ = generate_bars(synthetic_bars, symbol, n_planted=synthetic_bars // 2000)
+    frames[symbol] = bars.loc["2020":]
+
+os.makedirs(os.path.dirname(replay_fname), exist_ok=True)
+save_replay(replay_fname, frames)
+
+# Entries on bullish patterns and exits on bearish ones, alerted on the bar they complete
+
+alerts = PatternAlerts(
+    dict(entry=BULLISH_PATTERNS, exit=BEARISH_PATTERNS),
+    min_window,
+    max_window,
+    interp_mode=interp_mode,
+)
+
+def alert(signal):
+    if signal.active:
+        print(f"{signal.bar} {signal.symbol} {signal.side} {signal.pattern} from {signal.start} ({signal.similarity:.2f})")
+    else:
+        print(f"{signal.time} {signal.symbol} retract {signal.side} {signal.pattern} at {signal.bar}")
+
+asyncio.run(run_alerts(replay_feed(replay_fname, replay_interval), alerts, alert))
+
+latencies = np.array(alerts.latencies) * 1000
+print(
+    f"Latency per bar over the last {len(latencies):,} bars: median {np.median(latencies):.2f} ms, "
+    f"p99 {np.percentile(latencies, 99):.2f} ms, max {latencies.max():.2f} ms"
+)
+
+# The alerts still standing should be the batch search's ranges over the same bars
+
+templates = {
+    **{("entry", name): pattern for name, pattern in BULLISH_PATTERNS.items()},
+    **{("exit", name): pattern for name, pattern in BEARISH_PATTERNS.items()},
+}
+for symbol, bars in frames.items():
+    price = (bars["High"] + bars["Low"] + bars["Close"]) / 3
+    batch = PatternIndex(price, min_window, max_window, interp_mode=interp_mode).search(templates, processes=1)
+    online = alerts.matches(symbol)
+    for key, records in batch.items():
+        ends = records["end_idx"] + (records["status"] == 0)  # open ranges end on their last bar
+        expected = np.column_stack([records["start_idx"], ends, records["similarity"]])
+        assert len(expected) == len(online[key]) and np.allclose(expected, online[key]), (symbol, key)
+print(pd.Series({symbol: sum(map(len, alerts.matches(symbol).values())) for symbol in symbols}, name="matches"))
+print("Live alerts match the batch search")
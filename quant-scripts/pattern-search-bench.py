@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from pattern_search import PatternIndex, projection_bands
+from synthetic_data import ALL_PATTERNS, generate_bars, vbt
+
+# Chart-pattern search as trend-detection-vectorbt runs it, on one synthetic symbol per size
+SEARCH_SIZES = [10_000, 30_000, 100_000, 1_000_000]
+PLANTED_EVERY = 2_000  # bars per planted pattern
+MIN_WINDOW = 24
+MAX_WINDOW = 24 * 30
+MIN_OVERLAP = 0.5  # share of a planted pattern a match must cover to count as found
+VBT_SIZES = [10_000]  # sizes also searched with vbt's from_pattern_search, when vectorbtpro is installed
+
+# Projection scan as projection-sim-lite runs it, over universes of one year of hourly bars
+UNIVERSE_SIZES = [10, 100, 1_000]
+UNIVERSE_BARS = 24 * 365
+LAST_N_BARS = 66
+PRED_N_BARS = 12
+
+SEED = 0
+PROCESSES = None  # None for one process per CPU, for spans of each search and for the universe
+
+def recall(planted, matches):
+    # Share of planted patterns covered by a match of the same template
+    found = 0
+    for pattern, start, end in planted.itertuples(index=False):
+        ranges = matches[pattern]
+        overlap = np.minimum(ranges["end_idx"], end) - np.maximum(ranges["start_idx"], start)
+        found += bool((overlap >= MIN_OVERLAP * (end - start)).any())
+    return found / len(planted) if len(planted) else np.nan
+
+def vbt_search(price):
+    # The same search through vbt, as {template name: set of (start, end)} and the seconds it took
+    start = time.perf_counter()
+    ranges = vbt.PatternRanges.from_pattern_search(
+        price,
+        pattern=vbt.Param(ALL_PATTERNS, name="pattern"),
+        window=MIN_WINDOW,
+        max_window=MAX_WINDOW,
+        interp_mode="linear",
+    )
+    seconds = time.perf_counter() - start
+    records = ranges.records_arr
+    found = {name: set() for name in ALL_PATTERNS}
+    names = list(ranges.wrapper.columns.get_level_values("pattern"))
+    for col, start_idx, end_idx in zip(records["col"], records["start_idx"], records["end_idx"]):
+        found[names[col]].add((int(start_idx), int(end_idx)))
+    return found, seconds
+
+def agreement(matches, found):
+    # Share of the ranges either search found that both found
+    ours = {
+        (name, int(s), int(e))
+        for name, ranges in matches.items()
+        for s, e in zip(ranges["start_idx"], ranges["end_idx"])
+    }
+    theirs = {(name, s, e) for name, ranges in found.items() for s, e in ranges}
+    return len(ours & theirs) / len(ours | theirs) if ours | theirs else 1.0
+
+search_rows = []
+for n_bars in SEARCH_SIZES:
+    bars, planted = generate_bars(
+        n_bars,
+        seed=SEED,
+        n_planted=n_bars // PLANTED_EVERY,
+        window=MIN_WINDOW,
+        max_window=MAX_WINDOW,
+    )
+    price = (bars["High"] + bars["Low"] + bars["Close"]) / 3
+    start = time.perf_counter()
+    matches = PatternIndex(price, MIN_WINDOW, MAX_WINDOW, interp_mode="linear").search(ALL_PATTERNS, processes=PROCESSES)
+    seconds = time.perf_counter() - start
+    row = dict(
+        bars=n_bars,
+        seconds=seconds,
+        bars_per_second=n_bars / seconds,
+        planted=len(planted),
+        matches=sum(len(found) for found in matches.values()),
+        recall=recall(planted, matches),
+    )
+    if vbt is not None and n_bars in VBT_SIZES:
+        found, vbt_seconds = vbt_search(price)
+        row.update(vbt_seconds=vbt_seconds, speedup=vbt_seconds / seconds, agreement=agreement(matches, found))
+    search_rows.append(row)
+    print(search_rows[-1])
+
+universe_rows = []
+for n_symbols in UNIVERSE_SIZES:
+    close = pd.DataFrame({
+        f"SYN{i}": generate_bars(UNIVERSE_BARS, f"SYN{i}", seed=SEED)[0]["Close"]
+        for i in range(n_symbols)
+    })
+    start = time.perf_counter()
+    bands = projection_bands(close, close, LAST_N_BARS, PRED_N_BARS, processes=PROCESSES)
+    seconds = time.perf_counter() - start
+    universe_rows.append(dict(
+        symbols=n_symbols,
+        seconds=seconds,
+        bars_per_second=n_symbols * UNIVERSE_BARS / seconds,
+        with_projections=int((bands["matches"] > 0).sum()),
+    ))
+    print(universe_rows[-1])
+
+print(pd.DataFrame(search_rows).to_string(index=False))
+print(pd.DataFrame(universe_rows).to_string(index=False))
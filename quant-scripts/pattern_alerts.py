@@ -0,0 +1,147 @@
+"""Online chart-pattern alerts: the batch template search run bar by bar over a live feed.
+
+PatternAlerts keeps the last max_window bars of every symbol and, as each bar arrives,
+scores only the windows ending at it, with the same kernel and the same overlap rule as
+PatternIndex.search. Work per bar is bounded by the window sizes and templates, not by
+the history. A match is signalled on the bar it ends at, where the batch last_pd_mask puts
+it. A later, more similar match overlapping it replaces it, as in the batch search, and
+is signalled together with a retraction of the one it replaces. So once the feed ends,
+the signals still standing are exactly the batch ranges over the same bars.
+
+run_alerts() drives a detector from an asyncio feed such as synthetic_data.replay_feed.
+"""
+
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from pattern_search import INTERP_MODES, _score_end, _settle, search_tables
+
+# A match appearing (active=True) or being replaced (active=False): `side` is the pattern
+# group ("entry", "exit"), `bar` the timestamp of its last bar and `start` of its first
+Signal = namedtuple("Signal", "time symbol side pattern start bar similarity active")
+
+
+class SymbolBuffer:
+    """The last max_window bars of one symbol, with prefix sums for the kernel."""
+
+    def __init__(self, max_window):
+        self.max_window = max_window
+        self.price = np.empty(2 * max_window)
+        self.times = np.empty(2 * max_window, dtype=object)
+        self.sums = np.zeros(2 * max_window + 1)
+        self.size = 0
+        self.offset = 0  # bar number of price[0] since the symbol's first bar
+
+    def append(self, timestamp, price):
+        if self.size == len(self.price):
+            # Keep the bars the longest window ending at the next bar needs
+            keep = self.max_window - 1
+            self.price[:keep] = self.price[self.size - keep:self.size]
+            self.times[:keep] = self.times[self.size - keep:self.size]
+            self.sums[1:keep + 1] = np.cumsum(np.nan_to_num(self.price[:keep]))
+            self.offset += self.size - keep
+            self.size = keep
+        self.price[self.size] = price
+        self.times[self.size] = timestamp
+        self.sums[self.size + 1] = self.sums[self.size] + (0.0 if price != price else price)
+        self.size += 1
+
+    @property
+    def end(self):
+        """Bar number of the newest bar."""
+        return self.offset + self.size - 1
+
+
+class PatternAlerts:
+    """Detector for templates grouped by side, e.g. {"entry": BULLISH_PATTERNS, "exit": BEARISH_PATTERNS}.
+
+    Settings are those of PatternIndex(price, window, max_window, blocks, interp_mode=
+    interp_mode).search(..., min_similarity), whose matches the detector reproduces.
+    latencies holds the seconds update() took for the last `keep_latencies` bars.
+    """
+
+    def __init__(self, sides, window, max_window, min_similarity=0.85, blocks=6, *, interp_mode,
+                 keep_latencies=100_000):
+        if interp_mode not in INTERP_MODES:
+            raise ValueError(f"PatternAlerts stretches templates with one of {INTERP_MODES}, not {interp_mode!r}")
+        self.keys = [(side, name) for side, patterns in sides.items() for name in patterns]
+        self.tables = search_tables([sides[side][name] for side, name in self.keys], window, max_window, blocks,
+                                    interp_mode)
+        self.nearest = interp_mode == "nearest"
+        self.window = window
+        self.max_window = max_window
+        self.min_similarity = min_similarity
+        self.blocks = blocks
+        self.found = np.empty(((max_window - window + 1) * len(self.keys), 3))
+        self.buffers = {}
+        # Per symbol: matches that a later one may still replace, as (start, end, similarity)
+        # rows per template in absolute bar numbers, and the ones that are settled for good
+        self.open = {}
+        self.counts = {}
+        self.settled = {}
+        self.timestamps = {}  # first and last bar times of every match still open, by (start, end)
+        self.latencies = deque(maxlen=keep_latencies)
+
+    def update(self, symbol, timestamp, price):
+        """Take the next bar of a symbol and return the signals it raises."""
+        started = time.perf_counter()
+        if symbol not in self.buffers:
+            self.buffers[symbol] = SymbolBuffer(self.max_window)
+            self.open[symbol] = np.empty((len(self.keys), self.max_window // self.window + 2, 3))
+            self.counts[symbol] = np.zeros(len(self.keys), dtype=np.int64)
+            self.settled[symbol] = [[] for _ in self.keys]
+        buffer = self.buffers[symbol]
+        buffer.append(timestamp, price)
+        end = buffer.end
+        records, counts = self.open[symbol], self.counts[symbol]
+
+        signals = []
+        n_found = _score_end(buffer.price, buffer.sums, buffer.size - 1, *self.tables, self.window,
+                             self.max_window, self.blocks, self.min_similarity, self.nearest, self.found)
+        for t, start, similarity in self.found[:n_found]:
+            t = int(t)
+            start = buffer.offset + start
+            before = records[t, :counts[t]].copy()
+            count = _settle(records[t], counts[t], start, end + 1, similarity)
+            if count < 0:
+                continue
+            counts[t] = count
+            side, name = self.keys[t]
+            for old_start, old_end, old_similarity in before[count - 1:]:
+                first, last = self.timestamps.pop((symbol, t, old_start, old_end))
+                signals.append(Signal(timestamp, symbol, side, name, first, last, old_similarity, False))
+            first = buffer.times[int(start) - buffer.offset]
+            self.timestamps[(symbol, t, start, end + 1)] = (first, timestamp)
+            signals.append(Signal(timestamp, symbol, side, name, first, timestamp, similarity, True))
+
+        # Matches ending before any future window could start can no longer be replaced
+        horizon = end + 2 - self.max_window
+        for t in range(len(self.keys)):
+            done = 0
+            while done < counts[t] and records[t, done, 1] <= horizon:
+                done += 1
+            if done:
+                for row in records[t, :done]:
+                    self.settled[symbol][t].append(tuple(row))
+                    self.timestamps.pop((symbol, t, row[0], row[1]))
+                records[t, :counts[t] - done] = records[t, done:counts[t]]
+                counts[t] -= done
+        self.latencies.append(time.perf_counter() - started)
+        return signals
+
+    def matches(self, symbol):
+        """{(side, name): (start, end, similarity) rows} of a symbol's matches so far, ends exclusive."""
+        return {
+            key: np.array(self.settled[symbol][t] + [tuple(row) for row in self.open[symbol][t, :self.counts[symbol][t]]])
+            .reshape(-1, 3)
+            for t, key in enumerate(self.keys)
+        }
+
+
+async def run_alerts(feed, alerts, on_signal=print):
+    """Feed every (timestamp, symbol, bar) of an async iterator to alerts, by hlc3, passing signals on."""
+    async for timestamp, symbol, bar in feed:
+        for signal in alerts.update(symbol, timestamp, (bar.High + bar.Low + bar.Close) / 3):
+            on_signal(signal)
@@ -0,0 +1,498 @@
+"""Pattern search over shared sliding windows of one price series, without vectorbtpro.
+
+Scores windows the way vbt's find_pattern does with a pattern as long as the window, mean
+absolute error and absolute errors: similarity = 1 - sum|window - pattern| / sum(max
+distance), where the max distance of each point is how far it could be from the pattern
+inside the window's value range. With rescale_mode="rebase" the pattern is scaled to start
+at the window's first value, as projection-sim-lite searches.
+
+RollingPatternSearch keeps the window statistics (first value, running sums, minimum and
+maximum) of a series and extends them as bars are appended, so searching for pattern after
+pattern cut from the same series, like the frames of an animation, never recomputes them.
+A lower bound from the window sums alone rules most windows out before any is scored in
+full. pattern_ranges() wraps matches as the vbt.PatternRanges find_pattern would return,
+and projection_bands() runs the search over every column of a wide price frame at once,
+reducing each column's projections to a row of bands.
+
+PatternIndex does the same for PatternRanges.from_pattern_search over a range of window
+sizes: short templates stretched to every window size, min-max rescaling, and overlapping
+matches resolved in favour of the more similar one. Templates are stretched with
+interp_mode "linear" or "nearest" only; vbt's own default, "mixed", and "discrete" score
+the points between template points differently and still need from_pattern_search. All
+templates are scored in one pass over each column, sharing the column's prefix sums and
+each window's running minimum and maximum, and columns (or spans of a long column) are
+searched in parallel processes.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numba import njit
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Fields of vbt.pattern_range_dt, which PatternIndex.search returns
+RANGE_DT = np.dtype([
+    ("id", np.int64),
+    ("col", np.int64),
+    ("start_idx", np.int64),
+    ("end_idx", np.int64),
+    ("status", np.int64),
+    ("similarity", np.float64),
+])
+OPEN, CLOSED = 0, 1  # vbt.RangeStatus
+
+# vbt.InterpMode values PatternIndex can stretch templates with
+INTERP_MODES = ("linear", "nearest")
+
+# Chart-pattern templates trend-detection-vectorbt searches for
+BULLISH_PATTERNS = {
+    "double_bottom": [5, 1, 3, 1, 5],
+    "exp_triangle": [3, 4, 2, 5, 1, 6],
+    "asc_triangle": [1, 5, 2, 5, 3, 6],
+    "symm_triangle": [1, 6, 2, 5, 3, 6],
+    "pennant": [6, 1, 5, 2, 4, 3, 6]
+}
+BEARISH_PATTERNS = {
+    "head_and_shoulders": [1, 4, 2, 6, 2, 4, 1],
+    "double_top": [1, 5, 3, 5, 1],
+    "desc_triangle": [6, 2, 5, 2, 4, 1],
+    "symm_triangle": [6, 1, 5, 2, 4, 1],
+    "pennant": [1, 6, 2, 5, 3, 4, 1]
+}
+
+
+def similarity(windows, pattern, low=None, high=None, rescale_mode="rebase", pmin=None, pmax=None):
+    """Similarity of every row of `windows` (n, len(pattern)) to `pattern`.
+
+    low and high are the rows' minimum and maximum, computed here when not given. pmin
+    and pmax default to the pattern's; a stretched template keeps the original's.
+    """
+    windows = np.atleast_2d(windows)
+    pattern = np.asarray(pattern, dtype=float)
+    low = windows.min(axis=1) if low is None else low
+    high = windows.max(axis=1) if high is None else high
+    pmin = pattern.min() if pmin is None else pmin
+    pmax = pattern.max() if pmax is None else pmax
+
+    if rescale_mode == "rebase":
+        scale = windows[:, :1] / pattern[0]
+        target = scale * pattern
+        vmin = np.minimum(low, scale[:, 0] * pmin)[:, None]
+        vmax = np.maximum(high, scale[:, 0] * pmax)[:, None]
+        distance = np.abs(windows - target).sum(axis=1)
+    elif rescale_mode == "minmax":
+        # Flat windows have no range to rescale and never match
+        span = np.where(high > low, high - low, np.nan)[:, None]
+        rescaled = (windows - low[:, None]) / span * (pmax - pmin) + pmin
+        target = np.broadcast_to(pattern, windows.shape)
+        vmin, vmax = pmin, pmax
+        distance = np.abs(rescaled - target).sum(axis=1)
+    else:
+        raise ValueError(f"Unknown rescale_mode {rescale_mode!r}")
+
+    max_distance = np.maximum(target - vmin, vmax - target).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(max_distance > 0, 1 - distance / max_distance, np.where(distance == 0, 1.0, np.nan))
+
+
+class RollingPatternSearch:
+    """Windows of `window` bars of a growing price series, searched for patterns cut from it."""
+
+    def __init__(self, price, window):
+        self.window = window
+        self.price = np.empty(0)
+        self.sums = np.zeros(1)
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+        self.extend(price)
+
+    def __len__(self):
+        return len(self.price)
+
+    @property
+    def windows(self):
+        """(n_windows, window) view of the series; row i is the window starting at bar i."""
+        return sliding_window_view(self.price, self.window)
+
+    def extend(self, bars):
+        """Append bars, computing statistics for the windows they complete only."""
+        bars = np.asarray(bars, dtype=float)
+        done = len(self.low)
+        self.price = np.concatenate([self.price, bars])
+        self.sums = np.concatenate([self.sums, self.sums[-1] + np.cumsum(bars)])
+        if len(self.price) >= self.window:
+            new = sliding_window_view(self.price[done:], self.window)
+            self.low = np.concatenate([self.low, new.min(axis=1)])
+            self.high = np.concatenate([self.high, new.max(axis=1)])
+
+    def matches(self, end, min_similarity=0.85, rescale_mode="rebase"):
+        """(starts, similarities) of the windows matching the pattern of the last bars up to `end`.
+
+        Mirrors find_pattern(...).status_closed on price[:end + 1] with overlaps allowed: the
+        pattern is the window ending at bar `end`, and only windows ending before it count.
+        """
+        w = self.window
+        n_windows = end - w + 1
+        if n_windows <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        pattern = self.price[n_windows:end + 1]
+        starts = np.arange(n_windows)
+
+        if rescale_mode == "rebase":
+            # |sum(window - pattern)| bounds the distance from below and w * (max - min) the
+            # max distance from above, so windows too far off on sums alone cannot match
+            scale = self.price[:n_windows] / pattern[0]
+            vmin = np.minimum(self.low[:n_windows], scale * pattern.min())
+            vmax = np.maximum(self.high[:n_windows], scale * pattern.max())
+            gap = np.abs(self.sums[w:end + 1] - self.sums[:n_windows] - scale * pattern.sum())
+            starts = starts[gap <= (1 - min_similarity) * w * (vmax - vmin) * (1 + 1e-9)]
+
+        scores = similarity(self.windows[starts], pattern, self.low[starts], self.high[starts], rescale_mode)
+        keep = scores >= min_similarity
+        return starts[keep], scores[keep]
+
+
+def to_pattern_ranges(obj, records, search_configs, freq=None, **ohlc):
+    """vbt.PatternRanges over the columns of `obj` from RANGE_DT records."""
+    import vectorbtpro as vbt
+
+    records_arr = np.zeros(len(records), dtype=vbt.pattern_range_dt)
+    for name in RANGE_DT.names:
+        records_arr[name] = records[name]
+    return vbt.PatternRanges(
+        vbt.ArrayWrapper.from_obj(obj, freq=freq),
+        records_arr,
+        search_configs=[vbt.PSC(**config) for config in search_configs],
+        **ohlc,
+    )
+
+
+def pattern_ranges(price, starts, window, similarities, pattern=None, freq=None, **search_config):
+    """vbt.PatternRanges of closed matches of `window` bars starting at `starts` in a price Series.
+
+    pattern and search_config (rescale_mode, min_similarity, ...) are recorded in the
+    ranges' search config, as find_pattern would; freq goes to their wrapper.
+    """
+    records = np.zeros(len(starts), dtype=RANGE_DT)
+    records["id"] = np.arange(len(starts))
+    records["start_idx"] = starts
+    records["end_idx"] = np.asarray(starts) + window
+    records["status"] = CLOSED
+    records["similarity"] = similarities
+    if pattern is None:
+        pattern = price.values[-window:]
+    config = dict(pattern=pattern, window=window, **search_config)
+    return to_pattern_ranges(price, records, [config], freq=freq, close=price)
+
+
+def _bands_task(task):
+    price, close, window, horizon, quantiles, min_similarity = task
+    price = price.dropna()
+    close = close.reindex(price.index).to_numpy(dtype=float)
+    starts, _ = RollingPatternSearch(price.to_numpy(dtype=float), window).matches(len(price) - 1, min_similarity)
+    # Projections start at each match's last bar and need `horizon` bars after it
+    ends = starts + window - 1
+    ends = ends[ends + horizon < len(price)]
+    last = close[-1] if len(close) else np.nan
+    row = dict(matches=len(ends), close=last)
+    if len(ends):
+        final = close[ends + horizon] / close[ends] * last
+        row.update({f"{q:.0%}": value for q, value in zip(quantiles, np.quantile(final, quantiles))})
+        row["mean"] = final.mean()
+    return row
+
+
+def projection_bands(price, close, window, horizon, quantiles=(0.2, 0.5, 0.8), min_similarity=0.85,
+                     processes=None):
+    """Projected close `horizon` bars ahead for every column of a price frame, as a table.
+
+    Each column's last `window` bars are searched for in its own history as in
+    RollingPatternSearch.matches, and every match's next `horizon` bars of close, rebased
+    to the column's last close, are one projection, as with_delta(horizon).status_closed
+    projects them. Rows are columns, with the number of projections, the last close and
+    the quantiles and mean of the projected close. NaN bars (a symbol's missing history in
+    a wide frame) are skipped. Columns run in `processes` forked worker processes (one per
+    CPU for None, in-process for 1).
+    """
+    price = price if isinstance(price, pd.DataFrame) else price.to_frame()
+    close = close if isinstance(close, pd.DataFrame) else close.to_frame()
+    tasks = [(price[col], close[col], window, horizon, quantiles, min_similarity) for col in price.columns]
+    if processes == 1 or len(tasks) == 1:
+        rows = list(map(_bands_task, tasks))
+    else:
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork")) as pool:
+            rows = list(pool.map(_bands_task, tasks, chunksize=max(1, len(tasks) // 64)))
+    columns = ["matches", "close", *(f"{q:.0%}" for q in quantiles), "mean"]
+    return pd.DataFrame(rows, index=price.columns, columns=columns)
+
+
+def stretch(pattern, size, interp_mode="linear"):
+    """Template resized to `size` points, ends kept, by linear or nearest-point interpolation."""
+    pattern = np.asarray(pattern, dtype=float)
+    x = np.linspace(0, len(pattern) - 1, size)
+    if interp_mode == "nearest":
+        return pattern[np.round(x).astype(int)]
+    return np.interp(x, np.arange(len(pattern)), pattern)
+
+
+def block_edges(size, blocks):
+    return np.arange(min(blocks, size) + 1) * size // min(blocks, size)
+
+
+@njit(nogil=True, cache=True)
+def _score_end(arr, sums, end, templates, lengths, pmins, pmaxs, max_distances, block_sums,
+               window, max_window, blocks, min_similarity, nearest, found):
+    """Windows ending at bar `end` that match a template, written to `found` as (template, start, similarity) rows.
+
+    Windows grow from `window` to `max_window` bars back from `end`, keeping their minimum
+    and maximum as they grow, and rows come in that order, templates in order within a
+    window size. A template's distance to a window is at least the sum over blocks of
+    |sum of rescaled window - sum of stretched template| within the block, which the
+    prefix sums and block_sums give in O(blocks), so only windows passing that bound are
+    scored point by point, against the template stretched linearly or, with nearest, to its
+    nearest point. Returns the number of rows written.
+    """
+    n_templates = len(lengths)
+    n_found = 0
+    low = np.inf
+    high = -np.inf
+    for w in range(1, max_window + 1):
+        start = end - w + 1
+        if start < 0:
+            break
+        value = arr[start]
+        if value != value:
+            break
+        low = min(low, value)
+        high = max(high, value)
+        if w < window or high == low:
+            continue
+        wi = w - window
+        n_blocks = min(blocks, w)
+        for t in range(n_templates):
+            scale = (pmaxs[t] - pmins[t]) / (high - low)
+            budget = (1 - min_similarity) * max_distances[t, wi]
+
+            bound = 0.0
+            for b in range(n_blocks):
+                lo = start + b * w // n_blocks
+                hi = start + (b + 1) * w // n_blocks
+                rescaled = (sums[hi] - sums[lo] - low * (hi - lo)) * scale + pmins[t] * (hi - lo)
+                bound += abs(rescaled - block_sums[t, wi, b])
+            if bound > budget:
+                continue
+
+            distance = 0.0
+            m = lengths[t]
+            for k in range(w):
+                x = k * (m - 1) / (w - 1)
+                if nearest:
+                    target = templates[t, int(np.round(x))]
+                else:
+                    i = min(int(x), m - 2)
+                    target = templates[t, i] + (templates[t, i + 1] - templates[t, i]) * (x - i)
+                distance += abs((arr[start + k] - low) * scale + pmins[t] - target)
+                if distance > budget:
+                    break
+            if distance > budget:
+                continue
+
+            found[n_found, 0] = t
+            found[n_found, 1] = start
+            found[n_found, 2] = 1 - distance / max_distances[t, wi]
+            n_found += 1
+    return n_found
+
+
+@njit(nogil=True, cache=True)
+def _settle(records, count, start, end, similarity):
+    """Add a match to a template's non-overlapping (start, end, similarity) records, ordered by end.
+
+    The match is kept only if it beats every record it overlaps, which it replaces. Returns
+    the new record count, or -1 if the match was turned away; the match then sits at
+    records[new count - 1] and the records it replaced were at and after that slot.
+    """
+    first = count
+    while first > 0 and records[first - 1, 1] > start:
+        first -= 1
+    for r in range(first, count):
+        if records[r, 2] >= similarity:
+            return -1
+    records[first, 0] = start
+    records[first, 1] = end
+    records[first, 2] = similarity
+    return first + 1
+
+
+@njit(nogil=True, cache=True)
+def _score_span(arr, sums, templates, lengths, pmins, pmaxs, max_distances, block_sums,
+                window, max_window, blocks, min_similarity, nearest, first, last):
+    """Every matching window ending at bars first .. last - 1, as (template, start, end, similarity) rows.
+
+    Rows come in the order _score_end writes them, windows ending at each bar in turn, so
+    the spans of a column join up into the rows of the whole column.
+    """
+    n_templates = len(lengths)
+    found = np.empty(((max_window - window + 1) * n_templates, 3))
+    rows = np.empty((1024, 4))
+    n_rows = 0
+    for end in range(first, last):
+        n_found = _score_end(arr, sums, end, templates, lengths, pmins, pmaxs, max_distances, block_sums,
+                             window, max_window, blocks, min_similarity, nearest, found)
+        if n_rows + n_found > len(rows):
+            grown = np.empty((max(2 * len(rows), n_rows + n_found), 4))
+            grown[:n_rows] = rows[:n_rows]
+            rows = grown
+        for f in range(n_found):
+            rows[n_rows, 0] = found[f, 0]
+            rows[n_rows, 1] = found[f, 1]
+            rows[n_rows, 2] = end + 1
+            rows[n_rows, 3] = found[f, 2]
+            n_rows += 1
+    return rows[:n_rows]
+
+
+@njit(nogil=True, cache=True)
+def _settle_rows(rows, n_templates, capacity):
+    """Non-overlapping matches of every template, as (start, end, similarity) records per template.
+
+    Each row of _score_span is settled in turn against its template's matches so far (see
+    _settle). Returns the records and each template's count of them.
+    """
+    records = np.empty((n_templates, capacity, 3))
+    counts = np.zeros(n_templates, dtype=np.int64)
+    for i in range(len(rows)):
+        t = int(rows[i, 0])
+        count = _settle(records[t], counts[t], rows[i, 1], rows[i, 2], rows[i, 3])
+        if count >= 0:
+            counts[t] = count
+    return records, counts
+
+
+def search_tables(templates, window, max_window, blocks, interp_mode="linear"):
+    """Per-template arrays the kernel shares: padded templates, ranges, max distances, block sums."""
+    sizes = np.arange(window, max_window + 1)
+    lengths = np.array([len(t) for t in templates])
+    padded = np.zeros((len(templates), lengths.max()))
+    max_distances = np.empty((len(templates), len(sizes)))
+    block_sums = np.zeros((len(templates), len(sizes), blocks))
+    for t, template in enumerate(templates):
+        padded[t, :lengths[t]] = template
+        pmin, pmax = min(template), max(template)
+        for wi, size in enumerate(sizes):
+            stretched = stretch(template, size, interp_mode)
+            max_distances[t, wi] = np.maximum(stretched - pmin, pmax - stretched).sum()
+            edges = block_edges(size, blocks)
+            block_sums[t, wi, :len(edges) - 1] = np.add.reduceat(stretched, edges[:-1])
+    pmins = np.array([min(t) for t in templates], dtype=float)
+    pmaxs = np.array([max(t) for t in templates], dtype=float)
+    return padded, lengths, pmins, pmaxs, max_distances, block_sums
+
+
+def _search_task(task):
+    col, first, last, arr, tables, window, max_window, blocks, min_similarity, nearest = task
+    sums = np.concatenate([[0.0], np.cumsum(np.nan_to_num(arr))])
+    return col, _score_span(arr, sums, *tables, window, max_window, blocks, min_similarity, nearest, first, last)
+
+
+class PatternIndex:
+    """Search index over the columns of a price frame for templates at window to max_window bars.
+
+    search() gives the matches PatternRanges.from_pattern_search(price, pattern=..., window=
+    window, max_window=max_window, interp_mode=interp_mode) finds, with the other settings
+    at their defaults (min-max rescaling, min_similarity=0.85, overlaps disallowed). The
+    interp_mode has no default because vbt's, "mixed", is not one of INTERP_MODES: linear
+    templates are what from_pattern_search matches only when asked for "linear".
+    """
+
+    def __init__(self, price, window, max_window=None, blocks=6, *, interp_mode):
+        if interp_mode not in INTERP_MODES:
+            raise ValueError(f"PatternIndex stretches templates with one of {INTERP_MODES}, not {interp_mode!r}; "
+                             "use vbt.PatternRanges.from_pattern_search for other modes")
+        self.price = price if isinstance(price, pd.DataFrame) else price.to_frame()
+        self.window = window
+        self.max_window = window if max_window is None else max_window
+        self.blocks = blocks
+        self.interp_mode = interp_mode
+
+    def search(self, patterns, min_similarity=0.85, processes=None):
+        """Dict of name -> RANGE_DT records over the price columns for each template in `patterns`.
+
+        Every template is scored in the same pass over a column. Columns are searched in
+        `processes` forked worker processes (one per CPU for None, in-process for 1); with
+        fewer columns than processes, each column's bars are split into spans scored in
+        parallel, and the matches are settled in bar order once the spans are back.
+        """
+        names = list(patterns)
+        tables = search_tables([patterns[name] for name in names], self.window, self.max_window, self.blocks,
+                               self.interp_mode)
+        nearest = self.interp_mode == "nearest"
+        n, n_columns = self.price.shape
+        workers = 1 if processes == 1 else processes or os.cpu_count() or 1
+        edges = np.linspace(0, n, max(1, min(-(-workers // n_columns), n)) + 1).astype(int)
+        tasks = [
+            (col, first, last, self.price.iloc[:, col].to_numpy(dtype=float), tables, self.window,
+             self.max_window, self.blocks, min_similarity, nearest)
+            for col in range(n_columns) for first, last in zip(edges[:-1], edges[1:])
+        ]
+        if processes == 1 or len(tasks) == 1:
+            spans = list(map(_search_task, tasks))
+        else:
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork")) as pool:
+                spans = list(pool.map(_search_task, tasks))
+
+        # Spans come back in task order, so a column's rows join up in bar order
+        results = []
+        for col in range(n_columns):
+            rows = np.concatenate([found for span_col, found in spans if span_col == col])
+            records, counts = _settle_rows(rows, len(names), n // self.window + 1)
+            results.append((col, [records[t, :counts[t]] for t in range(len(names))]))
+
+        matches = {}
+        for t, name in enumerate(names):
+            rows = [(col, found[t]) for col, found in results]
+            records = np.zeros(sum(len(found) for _, found in rows), dtype=RANGE_DT)
+            i = 0
+            for col, found in rows:
+                chunk = records[i:i + len(found)]
+                chunk["col"] = col
+                chunk["start_idx"] = found[:, 0]
+                # A match ending at the last bar is still open and ends on it, as in vbt
+                is_open = found[:, 1] == n
+                chunk["end_idx"] = found[:, 1] - is_open
+                chunk["status"] = np.where(is_open, OPEN, CLOSED)
+                chunk["similarity"] = found[:, 2]
+                i += len(found)
+            records["id"] = np.arange(len(records))
+            matches[name] = records
+        return matches
+
+    def pattern_ranges(self, matches, patterns, level, freq=None, **ohlc):
+        """vbt.PatternRanges of search() matches, one column per template and price column.
+
+        Columns are keyed by template name under `level`, then the price columns, as
+        from_pattern_search with vbt.Param(patterns, name=level) builds them. ohlc frames
+        shaped like the price (open=, high=, ...) are tiled the same way.
+        """
+        names = list(matches)
+
+        def tile(frame):
+            return pd.concat({name: frame for name in names}, axis=1, names=[level])
+
+        n_columns = self.price.shape[1]
+        records = np.concatenate([
+            np.array(matches[name]) for name in names
+        ]) if names else np.zeros(0, dtype=RANGE_DT)
+        offsets = np.repeat(np.arange(len(names)) * n_columns, [len(matches[name]) for name in names])
+        records["col"] += offsets
+        records = records[np.lexsort((records["start_idx"], records["col"]))]
+        records["id"] = np.arange(len(records))
+        configs = [
+            dict(pattern=patterns[name], window=self.window, max_window=self.max_window, interp_mode=self.interp_mode)
+            for name in names for _ in range(n_columns)
+        ]
+        tiled = {key: tile(frame) for key, frame in ohlc.items()}
+        return to_pattern_ranges(tile(self.price), records, configs, freq=freq, **tiled)
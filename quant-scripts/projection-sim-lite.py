@@ -1,6 +1,13 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import imageio.v2 as imageio
 import plotly.io as pio
 pio.renderers.default = "jupyterlab"
 import vectorbtpro as vbt
+from bar_store import pull_cached
+from pattern_search import RollingPatternSearch, pattern_ranges as matched_ranges, projection_bands
 vbt.settings.set_theme("dark")
 
 SYMBOL = "BTC-USD"
@@ -14,22 +21,42 @@ GIF_FNAME = "projections.gif"
 GIF_N_BARS = 72
 GIF_FPS = 4
 GIF_PAD = 0.01
+GIF_PROCESSES = None  # frames rendered in parallel, None for one process per CPU
+
+SYMBOLS = [SYMBOL]  # universe scanned for projection bands, any number of tickers
+SCAN_PROCESSES = None  # symbols scanned in parallel, None for one process per CPU
+FIGURES = True  # also plot and animate SYMBOL's projections
+
+universe = pull_cached(vbt.YFData, SYMBOLS, TIMEFRAME, start=START, max_age=TIMEFRAME)
+
+# Projected close PRED_N_BARS ahead for every symbol, from one pass over the wide frame
+bands = projection_bands(universe.hlc3, universe.close, LAST_N_BARS, PRED_N_BARS, processes=SCAN_PROCESSES)
+print(bands.to_string(float_format="{:.2f}".format))
+
+if FIGURES:
+    if SYMBOL in SYMBOLS:
+        data = universe.select(SYMBOL)  # already pulled with the universe
+    else:
+        data = pull_cached(vbt.YFData, SYMBOL, TIMEFRAME, start=START, max_age=TIMEFRAME)
 
-data = vbt.YFData.pull(SYMBOL, timeframe=TIMEFRAME, start=START)
+    # Windows of the whole history, shared by the search of every frame below
+    search = RollingPatternSearch(data.hlc3.values, LAST_N_BARS)
 
 def find_patterns(data):
+    # Same matches as price.vbt.find_pattern(pattern=price.values[-LAST_N_BARS:],
+    # rescale_mode="rebase", overlap_mode="allow").status_closed, data being a prefix of
+    # the history the search holds
     price = data.hlc3
-    pattern = price.values[-LAST_N_BARS:]
-    pattern_ranges = price.vbt.find_pattern(
-        pattern=pattern,
+    starts, similarities = search.matches(len(price) - 1)
+    return matched_ranges(
+        price,
+        starts,
+        LAST_N_BARS,
+        similarities,
         rescale_mode="rebase",
         overlap_mode="allow",
-        wrapper_kwargs=dict(freq=TIMEFRAME)
+        freq=TIMEFRAME,
     )
-    pattern_ranges = pattern_ranges.status_closed
-    return pattern_ranges
-
-pattern_ranges = find_patterns(data)
 
 def plot_projections(data, pattern_ranges, **kwargs):
     projection_ranges = pattern_ranges.with_delta(
@@ -45,7 +72,9 @@ def plot_projections(data, pattern_ranges, **kwargs):
         **kwargs,
     )
 
-plot_projections(data, pattern_ranges, plot_bands=True).show()
+if FIGURES:
+    pattern_ranges = find_patterns(data)
+    plot_projections(data, pattern_ranges, plot_bands=True).show()
 
 def plot_frame(frame_index, **kwargs):
     sub_data = data.loc[:frame_index[-1]]
@@ -54,16 +83,28 @@ def plot_frame(frame_index, **kwargs):
         return None
     return plot_projections(sub_data, pattern_ranges, **kwargs)
 
-vbt.save_animation(
-    GIF_FNAME,
-    data.index[-GIF_N_BARS:],
-    plot_frame,
-    plot_projections=False,
-    delta=1,
-    fps=GIF_FPS,
-    writer_kwargs=dict(loop=0),
-    yaxis_range=[
-        data.low.iloc[-GIF_N_BARS:].min() * (1 - GIF_PAD), 
-        data.high.iloc[-GIF_N_BARS:].max() * (1 + GIF_PAD)
-    ],
-)
+def frame_image(frame_index, **kwargs):
+    fig = plot_frame(frame_index, **kwargs)
+    return None if fig is None else fig.to_image(format="png")
+
+def save_animation(fname, index, **kwargs):
+    # Like vbt.save_animation with delta=1, but frames render in forked worker processes,
+    # which inherit data and the search without pickling them
+    frame_indices = [index[i:i + 1] for i in range(len(index))]
+    with ProcessPoolExecutor(GIF_PROCESSES, mp_context=multiprocessing.get_context("fork")) as pool:
+        images = list(pool.map(partial(frame_image, **kwargs), frame_indices))
+    with imageio.get_writer(fname, fps=GIF_FPS, loop=0) as writer:
+        for image in images:
+            if image is not None:
+                writer.append_data(imageio.imread(image))
+
+if FIGURES:
+    save_animation(
+        GIF_FNAME,
+        data.index[-GIF_N_BARS:],
+        plot_projections=False,
+        yaxis_range=[
+            data.low.iloc[-GIF_N_BARS:].min() * (1 - GIF_PAD), 
+            data.high.iloc[-GIF_N_BARS:].max() * (1 + GIF_PAD)
+        ],
+    )
@@ -0,0 +1,140 @@
+"""Reproducible synthetic OHLCV bars with planted chart patterns, for running the scripts offline.
+
+generate_bars() draws a random walk and plants templates (BULLISH_PATTERNS and
+BEARISH_PATTERNS by default) into it at known places, so pattern searches can be scored for
+recall at any size. SyntheticData is a vectorbtpro data class like vbt.YFData and
+vbt.TVData, so the scripts and bar_store.pull_cached take it in their place, and
+replay_bars() hands the bars of several symbols out one at a time in time order, as a live
+feed would; save_replay() writes them to a file that replay_feed() serves as an asyncio
+stand-in for an exchange feed.
+"""
+
+import asyncio
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from bar_store import to_timestamp
+from pattern_search import BEARISH_PATTERNS, BULLISH_PATTERNS, stretch
+
+try:
+    import vectorbtpro as vbt
+except ImportError:
+    vbt = None
+
+ORIGIN = "2020-01-01"  # first bar of every generated series
+TIMEFRAMES = {"hourly": "1h", "daily": "1D", "weekly": "7D"}  # TVData-style names
+
+ALL_PATTERNS = {
+    **{f"bullish_{name}": pattern for name, pattern in BULLISH_PATTERNS.items()},
+    **{f"bearish_{name}": pattern for name, pattern in BEARISH_PATTERNS.items()},
+}
+
+
+def symbol_rng(symbol, seed=0):
+    """Generator seeded by the symbol and seed alone, so a symbol always gets the same bars."""
+    return np.random.default_rng([seed, zlib.crc32(str(symbol).encode())])
+
+
+def to_freq(timeframe):
+    return pd.Timedelta(TIMEFRAMES.get(timeframe, timeframe))
+
+
+def generate_bars(n_bars, symbol="SYN", seed=0, timeframe="1 hour", patterns=ALL_PATTERNS, n_planted=0,
+                  window=24, max_window=720, amplitude=0.08, volatility=0.005, pattern_noise=0.1,
+                  start_price=100.0):
+    """(bars, planted) for a synthetic symbol.
+
+    bars is an OHLCV frame of n_bars bars from ORIGIN at the timeframe's spacing, following a
+    geometric random walk with `volatility` per bar. n_planted templates drawn from `patterns`
+    replace the walk over non-overlapping stretches of window to max_window bars: the close
+    traces the stretched template over a range of `amplitude` of the price, with noise of
+    pattern_noise times the usual volatility, and the walk carries on from where it ends.
+    planted lists them with the template name and start and end bar (exclusive), in order.
+    """
+    rng = symbol_rng(symbol, seed)
+    returns = rng.normal(0, volatility, n_bars)
+    returns[0] = 0
+
+    rows = []
+    slot = n_bars // n_planted if n_planted else 0
+    if n_planted and slot < window:
+        raise ValueError(f"{n_planted} patterns of at least {window} bars do not fit in {n_bars} bars")
+    names = list(patterns)
+    for i in range(n_planted):
+        size = int(rng.integers(window, min(max_window, slot) + 1))
+        start = i * slot + int(rng.integers(0, slot - size + 1))
+        name = names[rng.integers(len(names))]
+        shape = stretch(patterns[name], size)
+        shape = (shape - shape.min()) / (shape.max() - shape.min())
+        path = np.log1p(amplitude * (shape - shape[0]))
+        returns[start + 1:start + size] = np.diff(path) + rng.normal(0, volatility * pattern_noise, size - 1)
+        rows.append((name, start, start + size))
+
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, volatility / 2, (2, n_bars)))
+    bars = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + spread[0]),
+            "Low": np.minimum(open_, close) * (1 - spread[1]),
+            "Close": close,
+            "Volume": rng.lognormal(10, 1, n_bars),
+        },
+        index=pd.date_range(ORIGIN, periods=n_bars, freq=to_freq(timeframe), tz="UTC", name="Open time"),
+    )
+    planted = pd.DataFrame(rows, columns=["pattern", "start_idx", "end_idx"])
+    return bars, planted
+
+
+def replay_bars(frames, start=None):
+    """(timestamp, symbol, bar) for every bar of a dict of symbol -> OHLCV frame, in time order.
+
+    Bars at the same timestamp come in the order of the symbols; start skips earlier bars.
+    """
+    stacked = pd.concat(frames, names=["symbol"]).swaplevel().sort_index(level=0, kind="stable")
+    if start is not None:
+        stacked = stacked.loc[pd.Timestamp(start):]
+    for (timestamp, symbol), bar in zip(stacked.index, stacked.itertuples(index=False)):
+        yield timestamp, symbol, bar
+
+
+def save_replay(path, frames):
+    """Write the bars of a dict of symbol -> OHLCV frame to a Parquet replay file, in time order."""
+    stacked = pd.concat(frames, names=["symbol"]).swaplevel().sort_index(level=0, kind="stable")
+    stacked.index = stacked.index.set_names(["time", "symbol"])
+    stacked.to_parquet(path)
+
+
+async def replay_feed(path, interval=0.0):
+    """Async iterator of (timestamp, symbol, bar) from a replay file, one bar every `interval` seconds.
+
+    With interval=0 it still hands control back to the event loop between bars.
+    """
+    stacked = pd.read_parquet(path)
+    for (timestamp, symbol), bar in zip(stacked.index, stacked.itertuples(index=False)):
+        await asyncio.sleep(interval)
+        yield timestamp, symbol, bar
+
+
+if vbt is not None:
+
+    class SyntheticData(vbt.Data):
+        """Data class generating bars instead of pulling them, with planted patterns.
+
+        SyntheticData.pull(symbols, timeframe=..., start=..., n_bars=..., n_planted=...)
+        works like vbt.YFData.pull; every symbol gets the bars generate_bars gives it, so
+        pulls of any span or order agree with each other.
+        """
+
+        @classmethod
+        def fetch_symbol(cls, symbol, timeframe="1 hour", start=None, end=None, n_bars=24 * 365,
+                         **generate_kwargs):
+            bars, _ = generate_bars(n_bars, symbol, timeframe=timeframe, **generate_kwargs)
+            if start is not None:
+                bars = bars[bars.index >= to_timestamp(start, "UTC")]
+            if end is not None:
+                bars = bars[bars.index < to_timestamp(end, "UTC")]
+            return bars
@@ -1,6 +1,9 @@
 import vectorbtpro as vbt
 import pandas as pd
 import numpy as np
+from bar_store import pull_cached
+from pattern_search import BEARISH_PATTERNS, BULLISH_PATTERNS, INTERP_MODES, PatternIndex
+from backtest_grid import total_returns
 
 vbt.settings.set_theme("dark")
 
@@ -12,61 +15,65 @@ symbols = [
     "NASDAQ:GOOG",
 ]
 
-data = vbt.TVData.pull(symbols, timeframe="hourly")
+data = pull_cached(vbt.TVData, symbols, "hourly", max_age="1 hour")
 
 data = data.xloc["2020":None]
 
 price = data.hlc3
 
-bullish_patterns = {
-    "double_bottom": [5, 1, 3, 1, 5],
-    "exp_triangle": [3, 4, 2, 5, 1, 6],
-    "asc_triangle": [1, 5, 2, 5, 3, 6],
-    "symm_triangle": [1, 6, 2, 5, 3, 6],
-    "pennant": [6, 1, 5, 2, 4, 3, 6]
-}
-bearish_patterns = {
-    "head_and_shoulders": [1, 4, 2, 6, 2, 4, 1],
-    "double_top": [1, 5, 3, 5, 1],
-    "desc_triangle": [6, 2, 5, 2, 4, 1],
-    "symm_triangle": [6, 1, 5, 2, 4, 1],
-    "pennant": [1, 6, 2, 5, 3, 4, 1]
-}
+bullish_patterns = BULLISH_PATTERNS
+bearish_patterns = BEARISH_PATTERNS
 
 pd.Series(bullish_patterns["double_bottom"]).vbt.plot().show()
 
 min_window = 24
 max_window = 24 * 30
 
-def detect_patterns(patterns):
-    return vbt.PatternRanges.from_pattern_search(
-        price,
+# "linear" and "nearest" stretch the templates the way PatternIndex can, which scores every
+# template and window size in one pass over each symbol's price, one process per symbol,
+# and is much faster. vbt's default, "mixed", scores the points between template points a
+# little differently, so its similarities (and the matches near min_similarity) can differ
+# slightly; setting it here searches with from_pattern_search instead
+interp_mode = "linear"
+
+if interp_mode in INTERP_MODES:
+    index = PatternIndex(price, min_window, max_window, interp_mode=interp_mode)
+    matches = index.search({
+        **{("bullish_pattern", name): pattern for name, pattern in bullish_patterns.items()},
+        **{("bearish_pattern", name): pattern for name, pattern in bearish_patterns.items()},
+    })
+
+def detect_patterns(patterns, name):
+    if interp_mode not in INTERP_MODES:
+        return vbt.PatternRanges.from_pattern_search(
+            price,
+            open=data.open,  # OHLC for plotting
+            high=data.high,
+            low=data.low,
+            close=data.close,
+            pattern=vbt.Param(patterns, name=name),
+            window=min_window,
+            max_window=max_window,
+            interp_mode=interp_mode,
+            execute_kwargs=dict(  # multithreading
+                engine="threadpool",
+                chunk_len="auto",
+                show_progress=True
+            )
+        )
+    # Same ranges as from_pattern_search above with this interp_mode
+    return index.pattern_ranges(
+        {pattern: matches[(name, pattern)] for pattern in patterns},
+        patterns,
+        name,
         open=data.open,  # OHLC for plotting
         high=data.high,
         low=data.low,
         close=data.close,
-        pattern=patterns,
-        window=min_window,
-        max_window=max_window,
-        execute_kwargs=dict(  # multithreading
-            engine="threadpool", 
-            chunk_len="auto", 
-            show_progress=True
-        )
     )
 
-bullish_matches = detect_patterns(
-    vbt.Param(
-        bullish_patterns, 
-        name="bullish_pattern"
-    )
-)
-bearish_matches = detect_patterns(
-    vbt.Param(
-        bearish_patterns, 
-        name="bearish_pattern"
-    )
-)
+bullish_matches = detect_patterns(bullish_patterns, "bullish_pattern")
+bearish_matches = detect_patterns(bearish_patterns, "bearish_pattern")
 
 vbt.settings.plotting.auto_rangebreaks = True  # for stocks
 
@@ -86,11 +93,14 @@ bullish_matches.plot(
 entries = bullish_matches.last_pd_mask
 exits = bearish_matches.last_pd_mask
 
-entries, exits = entries.vbt.x(exits)
+# Backtest every bullish/bearish pair in batches instead of entries.vbt.x(exits), keeping
+# only the total returns; the batches in flight stay under grid_memory bytes
+
+grid_memory = 2 * 1024 ** 3
 
-# Establish Portfolio
+total_return = total_returns(data.close, entries, exits, max_memory=grid_memory)
 
-pf = vbt.Portfolio.from_signals(data, entries, exits)
+mean_total_return = total_return.groupby(level=["bullish_pattern", "bearish_pattern"]).mean()
 
 mean_total_return.vbt.heatmap(
     x_level="bearish_pattern", 